@@ -19,7 +19,7 @@ class QuestionRequest(BaseModel):
     """Request model for asking questions"""
     document_id: str
     question: str
-    conversation_history: Optional[List[Dict]] = []
+    conversation_history: List[Dict] = Field(default_factory=list)
 
 
 class QuestionResponse(BaseModel):
@@ -69,6 +69,46 @@ class EvaluateAnswerResponse(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
 
 
+class EvaluateItem(BaseModel):
+    """A single answer within a batch evaluation request"""
+    question: str
+    user_answer: str
+    correct_answer: str
+
+
+class BatchEvaluateRequest(BaseModel):
+    """Request model for evaluating several answers in one call"""
+    document_id: str
+    items: List[EvaluateItem]
+
+
+class BatchSummaryRequest(BaseModel):
+    """Request model for batch summary generation"""
+    document_ids: List[str]
+
+
+class BatchChallengeRequest(BaseModel):
+    """Request model for batch challenge question generation"""
+    document_ids: List[str]
+    count: int = 3
+
+
+class BatchJobResponse(BaseModel):
+    """Response model for a submitted batch job"""
+    job_id: str
+    status: str
+    document_ids: List[str]
+    submitted_at: datetime = Field(default_factory=datetime.now)
+
+
+class BatchJobStatusResponse(BaseModel):
+    """Response model for polling a batch job"""
+    job_id: str
+    status: str
+    results: Dict[str, Any] = {}
+    error: Optional[str] = None
+
+
 class DocumentInfo(BaseModel):
     """Model for document information"""
     document_id: str
@@ -24,9 +24,21 @@ class Config:
 
     # LLM Settings
     MODEL_NAME = "gemini-2.0-flash"
+    EMBEDDING_MODEL_NAME = "gemini-embedding-001"
     MAX_OUTPUT_TOKENS = 2048
     TEMPERATURE = 0.3
 
+    # Semantic cache settings
+    CACHE_SIMILARITY_THRESHOLD = 0.92
+    CACHE_TTL_SECONDS = 3600
+
+    # In-memory document cache bounds (cold entries reload from disk)
+    DOCUMENT_CACHE_MAXSIZE = 1000
+    DOCUMENT_CACHE_TTL_SECONDS = 3600
+
+    # How long finished batch-job records are kept around for polling
+    BATCH_JOB_TTL_SECONDS = 24 * 3600
+
     # Application Settings
     SUMMARY_MAX_WORDS = 150
     CHALLENGE_QUESTIONS_COUNT = 3
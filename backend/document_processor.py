@@ -1,4 +1,6 @@
+import io
 import os
+import shutil
 import PyPDF2
 import docx
 from typing import Optional, Dict, Any
@@ -24,6 +26,22 @@ class DocumentProcessor:
             file_content: Raw bytes of the uploaded file
             filename: Name of the uploaded file
 
+        Returns:
+            Dictionary containing extracted text and metadata
+        """
+        return self.process_document_file(io.BytesIO(file_content), filename)
+
+    def process_document_file(self, fileobj, filename: str) -> Dict[str, Any]:
+        """
+        Process an uploaded document from a readable file object
+
+        Streams the file object to a temporary file in chunks so the whole
+        payload never has to exist as a single bytes object.
+
+        Args:
+            fileobj: Binary file-like object positioned anywhere
+            filename: Name of the uploaded file
+
         Returns:
             Dictionary containing extracted text and metadata
         """
@@ -35,7 +53,8 @@ class DocumentProcessor:
 
             # Create temporary file
             with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-                tmp_file.write(file_content)
+                fileobj.seek(0)
+                shutil.copyfileobj(fileobj, tmp_file, length=1024 * 1024)
                 tmp_file_path = tmp_file.name
 
             try:
@@ -0,0 +1,78 @@
+from pathlib import Path
+from typing import Optional
+import logging
+
+import msgspec
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DocRecord(msgspec.Struct):
+    """On-disk metadata record for an uploaded document"""
+    id: str
+    filename: str
+    file_type: str
+    word_count: int
+    char_count: int
+    summary: str
+    upload_timestamp: str
+
+
+class DocumentStore:
+    """Disk-backed persistence for uploaded documents
+
+    Metadata is serialized with msgspec (no pydantic on the read path)
+    and the raw text is written to its own file, so documents survive
+    restarts and entries evicted from the in-memory cache can be
+    rehydrated from disk on demand.
+    """
+
+    def __init__(self, base_dir: str = "documents"):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder(DocRecord)
+
+    def _record_path(self, doc_id: str) -> Path:
+        return self.base_dir / f"{doc_id}.json"
+
+    def _text_path(self, doc_id: str) -> Path:
+        return self.base_dir / f"{doc_id}.txt"
+
+    def save(self, record: DocRecord, text: str):
+        """Persist a document record and its raw text"""
+        try:
+            self._text_path(record.id).write_bytes(text.encode("utf-8"))
+            self._record_path(record.id).write_bytes(
+                self._encoder.encode(record))
+        except Exception as e:
+            logger.error(f"Failed to persist document {record.id}: {str(e)}")
+
+    def load(self, doc_id: str) -> Optional[DocRecord]:
+        """Load a document record, or None if it was never persisted"""
+        path = self._record_path(doc_id)
+        if not path.exists():
+            return None
+        try:
+            return self._decoder.decode(path.read_bytes())
+        except Exception as e:
+            logger.error(f"Failed to load document record {doc_id}: {str(e)}")
+            return None
+
+    def get_text(self, doc_id: str) -> Optional[str]:
+        """Return the raw document text, or None if it was never persisted"""
+        path = self._text_path(doc_id)
+        if not path.exists():
+            return None
+        try:
+            return path.read_bytes().decode("utf-8")
+        except Exception as e:
+            logger.error(f"Failed to read document text {doc_id}: {str(e)}")
+            return None
+
+    def delete(self, doc_id: str):
+        """Remove a document's record and text file"""
+        for path in (self._record_path(doc_id), self._text_path(doc_id)):
+            if path.exists():
+                path.unlink()
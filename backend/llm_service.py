@@ -1,30 +1,283 @@
 import google.generativeai as genai
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema import Document
-from typing import List, Dict, Any, Optional
+from semantic_text_splitter import TextSplitter
+from sklearn.feature_extraction.text import TfidfVectorizer
+from typing import List, Dict, Any, Optional, TypedDict
+import functools
+import hashlib
 import logging
 import json
 import re
+import threading
+import time
+import numpy as np
+from cachetools import TTLCache
 from backend.config import Config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_configure_lock = threading.Lock()
+_configured = False
+
+
+def configure_genai():
+    """
+    Configure the Gemini client once per process
+
+    Under multiple uvicorn workers each process configures exactly once;
+    the REST transport reuses one pooled HTTP client for all concurrent
+    requests in the process.
+    """
+    global _configured
+    with _configure_lock:
+        if not _configured:
+            Config.validate_config()
+            genai.configure(api_key=Config.GOOGLE_API_KEY, transport="rest")
+            _configured = True
+
+
+# Sentence boundary pattern shared by indexing and snippet fallback
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+
+class _AnswerSchema(TypedDict):
+    """Structured output schema for question answering"""
+    answer: str
+    justification: str
+
+
+class _ChallengeQuestionSchema(TypedDict):
+    """Structured output schema for a generated challenge question"""
+    question: str
+    correct_answer: str
+    explanation: str
+    difficulty: str
+
+
+class _EvaluationSchema(TypedDict):
+    """Structured output schema for answer evaluation"""
+    score: int
+    feedback: str
+    reference: str
+
+
+# Generation configs are fixed per call site; build them once at import.
+# Structured-output schemas make Gemini return well-formed JSON directly,
+# so no regex extraction is needed on the responses.
+_GEN_CFG_SUMMARY = genai.types.GenerationConfig(
+    temperature=Config.TEMPERATURE, max_output_tokens=300)
+_GEN_CFG_ANSWER = genai.types.GenerationConfig(
+    temperature=Config.TEMPERATURE, max_output_tokens=Config.MAX_OUTPUT_TOKENS,
+    response_mime_type="application/json", response_schema=_AnswerSchema)
+_GEN_CFG_CHALLENGE = genai.types.GenerationConfig(
+    temperature=0.5,  # Slightly higher for creativity
+    max_output_tokens=Config.MAX_OUTPUT_TOKENS,
+    response_mime_type="application/json",
+    response_schema=list[_ChallengeQuestionSchema])
+_GEN_CFG_EVALUATE = genai.types.GenerationConfig(
+    temperature=Config.TEMPERATURE, max_output_tokens=1000,
+    response_mime_type="application/json", response_schema=_EvaluationSchema)
+# Streaming emits plain prose chunk by chunk, so no JSON schema here
+_GEN_CFG_ANSWER_STREAM = genai.types.GenerationConfig(
+    temperature=Config.TEMPERATURE, max_output_tokens=Config.MAX_OUTPUT_TOKENS)
+
+# Stop words excluded from keyword-overlap snippet scoring
+_COMMON_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have',
+    'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'may', 'might', 'can', 'this', 'that', 'these', 'those'
+})
+
+
+class SemanticCache:
+    """In-memory semantic cache for LLM responses
+
+    Stores an embedding per cached question, grouped by document. A lookup
+    embeds the incoming question and returns the stored response when the
+    best cosine similarity exceeds the threshold, so semantically similar
+    questions skip the Gemini call entirely. Entries expire after a TTL.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.92, ttl_seconds: int = 3600):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        # {doc_id: list of (expires_at, question, response_dict)}
+        self._entries: Dict[str, List[tuple]] = {}
+        # {doc_id: (n, dim) matrix of embeddings, rows parallel to _entries}
+        self._embeddings: Dict[str, np.ndarray] = {}
+        # Batch endpoints call get/put from worker threads; the lock keeps
+        # the entry list and embedding matrix in step with each other
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text, returning None on failure so callers fall through to the LLM"""
+        try:
+            configure_genai()
+            result = genai.embed_content(
+                model=Config.EMBEDDING_MODEL_NAME, content=text)
+            return np.asarray(result["embedding"], dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Embedding failed, skipping semantic cache: {str(e)}")
+            return None
+
+    def _evict_expired(self, doc_id: str):
+        """Drop expired entries for a document; caller must hold the lock"""
+        entries = self._entries.get(doc_id)
+        if not entries:
+            return
+
+        now = time.time()
+        keep = [i for i, (expires_at, _, _) in enumerate(entries)
+                if expires_at > now]
+
+        if len(keep) == len(entries):
+            return
+
+        if keep:
+            self._entries[doc_id] = [entries[i] for i in keep]
+            self._embeddings[doc_id] = self._embeddings[doc_id][keep]
+        else:
+            self._entries.pop(doc_id, None)
+            self._embeddings.pop(doc_id, None)
+
+    def get(self, doc_id: str, question: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for a semantically similar question, if any"""
+        # Snapshot both structures under the lock so the rows stay
+        # aligned; the embedding call and the matrix product run outside
+        with self._lock:
+            self._evict_expired(doc_id)
+            emb_matrix = self._embeddings.get(doc_id)
+            entries = list(self._entries.get(doc_id, ()))
+
+        if emb_matrix is None or emb_matrix.shape[0] == 0:
+            return None
+
+        query = self._embed(question)
+        if query is None:
+            return None
+
+        # Cosine similarity against all cached questions in one matrix product
+        norms = np.linalg.norm(emb_matrix, axis=1) * np.linalg.norm(query)
+        norms[norms == 0] = 1e-10
+        similarities = (emb_matrix @ query) / norms
+
+        best_index = int(np.argmax(similarities))
+        if similarities[best_index] >= self.similarity_threshold:
+            _, cached_question, response = entries[best_index]
+            logger.info(
+                f"Semantic cache hit for document {doc_id} "
+                f"(similarity {similarities[best_index]:.3f}, cached question: {cached_question[:50]!r})")
+            return dict(response)
+
+        return None
+
+    def put(self, doc_id: str, question: str, response: Dict[str, Any]):
+        """Cache a response under the question's embedding"""
+        embedding = self._embed(question)
+        if embedding is None:
+            return
+
+        entry = (time.time() + self.ttl_seconds, question, dict(response))
+        with self._lock:
+            if doc_id in self._entries:
+                self._entries[doc_id].append(entry)
+                self._embeddings[doc_id] = np.vstack(
+                    [self._embeddings[doc_id], embedding])
+            else:
+                self._entries[doc_id] = [entry]
+                self._embeddings[doc_id] = embedding.reshape(1, -1)
+
 
 class LLMService:
-    """Service for interacting with Google Gemini API via LangChain"""
+    """Service for interacting with Google Gemini API"""
 
     def __init__(self):
         Config.validate_config()
-        genai.configure(api_key=Config.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel(Config.MODEL_NAME)
-
-        # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=2000,
-            chunk_overlap=200,
-            length_function=len,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+
+        # Rust-backed recursive splitter; use .chunks(text) to split
+        self.text_splitter = TextSplitter(capacity=2000, overlap=200)
+
+        # Semantic cache for question answering only
+        self.semantic_cache = SemanticCache(
+            similarity_threshold=Config.CACHE_SIMILARITY_THRESHOLD,
+            ttl_seconds=Config.CACHE_TTL_SECONDS
+        )
+
+        # Evaluations are cached by exact (question, answer) match:
+        # embeddings of two different answers to the same question can
+        # clear the similarity threshold, which would hand one answer
+        # the other's score
+        self._eval_cache: TTLCache = TTLCache(
+            maxsize=512, ttl=Config.CACHE_TTL_SECONDS)
+        self._eval_cache_lock = threading.Lock()
+
+        # Summary cache keyed by document content hash, so re-uploading
+        # the same file skips the LLM call entirely
+        self._summary_cache: Dict[str, Dict[str, Any]] = {}
+
+    @functools.cached_property
+    def model(self):
+        """Lazily construct the Gemini model; one instance shared per process"""
+        configure_genai()
+        return genai.GenerativeModel(Config.MODEL_NAME)
+
+    def create_document_cache(self, document_text: str, ttl_seconds: int = 3600):
+        """
+        Create a Gemini explicit content cache for a document
+
+        The cached content is referenced on subsequent calls instead of
+        resending the document text in every prompt, which cuts input-token
+        cost and time-to-first-token. Returns None when caching is
+        unavailable (e.g., the document is below the minimum token count).
+
+        Args:
+            document_text: Full text of the document to cache
+            ttl_seconds: How long the cache entry should live
+
+        Returns:
+            A CachedContent handle, or None if creation failed
+        """
+        try:
+            configure_genai()
+            return genai.caching.CachedContent.create(
+                model=Config.MODEL_NAME,
+                contents=[document_text],
+                ttl=f"{ttl_seconds}s"
+            )
+        except Exception as e:
+            logger.warning(f"Content cache creation failed, using inline text: {str(e)}")
+            return None
+
+    def _generate_with_cache(self, build_prompt, generation_config, cached_content=None):
+        """
+        Generate content, preferring the document content cache when available
+
+        Args:
+            build_prompt: Callable taking include_document (bool) and returning
+                the full prompt; the document section is omitted when the
+                cached content carries it
+            generation_config: GenerationConfig for the call
+            cached_content: Optional CachedContent handle for the document
+
+        Returns:
+            The Gemini response
+        """
+        if cached_content is not None:
+            try:
+                model = genai.GenerativeModel.from_cached_content(
+                    cached_content=cached_content)
+                return model.generate_content(
+                    build_prompt(include_document=False),
+                    generation_config=generation_config
+                )
+            except Exception as e:
+                # Cache may have expired; fall back to the inline document
+                logger.warning(
+                    f"Cached content unavailable, falling back to inline text: {str(e)}")
+
+        return self.model.generate_content(
+            build_prompt(include_document=True),
+            generation_config=generation_config
         )
 
     def generate_summary(self, document_text: str, max_words: int = 150) -> Dict[str, Any]:
@@ -38,34 +291,48 @@ class LLMService:
         Returns:
             Dictionary containing summary and metadata
         """
-        try:
-            prompt = f"""
-            Please provide a concise summary of the following document in no more than {max_words} words. 
-            The summary should capture the main points, key findings, and overall theme of the document.
-            
-            Document:
-            {document_text[:4000]}  # Limit input for API constraints
-            
-            Summary (max {max_words} words):
-            """
+        content_hash = hashlib.sha256(document_text.encode("utf-8")).hexdigest()
+        cached = self._summary_cache.get(content_hash)
+        if cached is not None:
+            logger.info(f"Summary cache hit for content hash {content_hash[:12]}")
+            return dict(cached)
 
+        try:
             response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=Config.TEMPERATURE,
-                    max_output_tokens=300
-                )
+                self._summary_prompt(document_text, max_words),
+                generation_config=_GEN_CFG_SUMMARY
             )
+            return self._finish_summary(response, content_hash)
 
-            summary = response.text.strip()
-            word_count = len(summary.split())
-
+        except Exception as e:
+            logger.error(f"Error generating summary: {str(e)}")
             return {
-                "summary": summary,
-                "word_count": word_count,
-                "status": "success"
+                "summary": "Error generating summary",
+                "word_count": 0,
+                "status": "error",
+                "error": str(e)
             }
 
+    async def generate_summary_async(self, document_text: str, max_words: int = 150) -> Dict[str, Any]:
+        """
+        Async variant of generate_summary for use on the upload path
+
+        Awaitable so the caller can overlap the summary call with other
+        per-document work (indexing, content caching) via asyncio.gather.
+        """
+        content_hash = hashlib.sha256(document_text.encode("utf-8")).hexdigest()
+        cached = self._summary_cache.get(content_hash)
+        if cached is not None:
+            logger.info(f"Summary cache hit for content hash {content_hash[:12]}")
+            return dict(cached)
+
+        try:
+            response = await self.model.generate_content_async(
+                self._summary_prompt(document_text, max_words),
+                generation_config=_GEN_CFG_SUMMARY
+            )
+            return self._finish_summary(response, content_hash)
+
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}")
             return {
@@ -75,7 +342,33 @@ class LLMService:
                 "error": str(e)
             }
 
-    def answer_question(self, question: str, document_text: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
+    def _summary_prompt(self, document_text: str, max_words: int) -> str:
+        """Build the summary prompt shared by the sync and async paths"""
+        return f"""
+            Please provide a concise summary of the following document in no more than {max_words} words.
+            The summary should capture the main points, key findings, and overall theme of the document.
+
+            Document:
+            {document_text[:4000]}  # Limit input for API constraints
+
+            Summary (max {max_words} words):
+            """
+
+    def _finish_summary(self, response, content_hash: str) -> Dict[str, Any]:
+        """Post-process a summary response and populate the cache"""
+        summary = response.text.strip()
+
+        result = {
+            "summary": summary,
+            "word_count": len(summary.split()),
+            "status": "success"
+        }
+        self._summary_cache[content_hash] = dict(result)
+        return result
+
+    def answer_question(self, question: str, document_text: str, conversation_history: List[Dict] = None,
+                        document_id: Optional[str] = None, cached_content=None,
+                        snippet_index: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Answer a question based on the document content
 
@@ -83,71 +376,83 @@ class LLMService:
             question: User's question
             document_text: Full document text
             conversation_history: Previous conversation for context
+            document_id: Document identifier used for semantic caching
+            cached_content: Optional Gemini content cache holding the document
+            snippet_index: Precomputed sentence index from build_snippet_index
 
         Returns:
             Dictionary containing answer and justification
         """
+        if document_id:
+            cached = self.semantic_cache.get(document_id, question)
+            if cached is not None:
+                return cached
+
         try:
             # Build context from conversation history
             context = ""
             if conversation_history:
                 context = "\n\nPrevious conversation:\n"
                 for exchange in conversation_history[-3:]:  # Last 3 exchanges
-                    context += f"Q: {exchange.get('question', '')}\nA: {exchange.get('answer', '')}\n"
+                    # Clients send the slim {"q", "a"} shape; fall back to
+                    # the older verbose keys
+                    question_text = exchange.get('q', exchange.get('question', ''))
+                    answer_text = exchange.get('a', exchange.get('answer', ''))
+                    context += f"Q: {question_text}\nA: {answer_text}\n"
+
+            def build_prompt(include_document: bool) -> str:
+                document_section = f"""Document:
+            {document_text[:6000]}  # Limit for API constraints
+            """ if include_document else ""
 
-            prompt = f"""
-            Based on the following document, please answer the question. Your answer must be:
+                return f"""
+            Based on the provided document, please answer the question. Your answer must be:
             1. Directly supported by the document content
             2. Include specific references to sections/paragraphs where the information is found
             3. If the information is not in the document, clearly state that
             4. Be accurate and avoid hallucination
-            
-            Document:
-            {document_text[:6000]}  # Limit for API constraints
-            
+
+            {document_section}
             {context}
-            
+
             Question: {question}
-            
-            Please provide your answer in the following format:
-            Answer: [Your detailed answer here]
-            
-            Justification: [Specific reference to where this information is found in the document, e.g., "This information is found in paragraph 3 of section 2..." or "According to the document's introduction..."]
-            
-            If the information is not available in the document, state: "This information is not available in the provided document."
-            """
 
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=Config.TEMPERATURE,
-                    max_output_tokens=Config.MAX_OUTPUT_TOKENS
-                )
-            )
+            Respond with a JSON object containing:
+            - "answer": your detailed answer
+            - "justification": the specific reference to where this information is found in the document, e.g., "This information is found in paragraph 3 of section 2..." or "According to the document's introduction..."
 
-            response_text = response.text.strip()
+            If the information is not available in the document, the answer must state: "This information is not available in the provided document."
+            """
 
-            # Parse answer and justification
-            answer_match = re.search(
-                r'Answer:\s*(.*?)(?=\n\nJustification:|$)', response_text, re.DOTALL)
-            justification_match = re.search(
-                r'Justification:\s*(.*?)$', response_text, re.DOTALL)
+            response = self._generate_with_cache(
+                build_prompt,
+                generation_config=_GEN_CFG_ANSWER,
+                cached_content=cached_content
+            )
 
-            answer = answer_match.group(
-                1).strip() if answer_match else response_text
-            justification = justification_match.group(1).strip(
-            ) if justification_match else "Based on document analysis"
+            try:
+                data = json.loads(response.text)
+            except json.JSONDecodeError:
+                # Long answers can hit max_output_tokens mid-JSON; fall
+                # back to the raw text rather than failing the request
+                data = {"answer": response.text}
+            answer = data.get("answer", "").strip()
+            justification = data.get(
+                "justification", "Based on document analysis").strip()
 
             # Find relevant text snippet
             snippet = self._find_relevant_snippet(
-                document_text, answer, question)
+                document_text, answer, question, snippet_index=snippet_index)
 
-            return {
+            result = {
                 "answer": answer,
                 "justification": justification,
                 "snippet": snippet,
                 "status": "success"
             }
+            if document_id:
+                self.semantic_cache.put(document_id, question, result)
+            return result
 
         except Exception as e:
             logger.error(f"Error answering question: {str(e)}")
@@ -159,73 +464,136 @@ class LLMService:
                 "error": str(e)
             }
 
-    def generate_challenge_questions(self, document_text: str, count: int = 3) -> Dict[str, Any]:
+    def answer_question_stream(self, question: str, document_text: str, conversation_history: List[Dict] = None,
+                               cached_content=None, snippet_index: Optional[Dict[str, Any]] = None):
+        """
+        Stream an answer to a question as Gemini generates it
+
+        Yields {"chunk": text} dictionaries per generated fragment and a
+        final {"done": True, "snippet": ...} payload once the stream
+        closes, so callers can show the first tokens in well under the
+        full generation time.
+
+        Args:
+            question: User's question
+            document_text: Full document text
+            conversation_history: Previous conversation for context
+            cached_content: Optional Gemini content cache holding the document
+            snippet_index: Precomputed sentence index from build_snippet_index
+
+        Yields:
+            Event dictionaries suitable for SSE serialization
+        """
+        try:
+            context = ""
+            if conversation_history:
+                context = "\n\nPrevious conversation:\n"
+                for exchange in conversation_history[-3:]:  # Last 3 exchanges
+                    # Clients send the slim {"q", "a"} shape; fall back to
+                    # the older verbose keys
+                    question_text = exchange.get('q', exchange.get('question', ''))
+                    answer_text = exchange.get('a', exchange.get('answer', ''))
+                    context += f"Q: {question_text}\nA: {answer_text}\n"
+
+            def build_prompt(include_document: bool) -> str:
+                document_section = f"""Document:
+            {document_text[:6000]}  # Limit for API constraints
+            """ if include_document else ""
+
+                return f"""
+            Based on the provided document, please answer the question. Your answer must be:
+            1. Directly supported by the document content
+            2. Include specific references to sections/paragraphs where the information is found
+            3. If the information is not in the document, clearly state that
+            4. Be accurate and avoid hallucination
+
+            {document_section}
+            {context}
+
+            Question: {question}
+
+            Answer in clear prose, citing where in the document the information is found.
+            If the information is not available in the document, state: "This information is not available in the provided document."
+            """
+
+            model = self.model
+            prompt = build_prompt(include_document=True)
+            if cached_content is not None:
+                try:
+                    model = genai.GenerativeModel.from_cached_content(
+                        cached_content=cached_content)
+                    prompt = build_prompt(include_document=False)
+                except Exception as e:
+                    logger.warning(
+                        f"Cached content unavailable, falling back to inline text: {str(e)}")
+
+            response_stream = model.generate_content(
+                prompt,
+                stream=True,
+                generation_config=_GEN_CFG_ANSWER_STREAM
+            )
+
+            parts = []
+            for chunk in response_stream:
+                text = getattr(chunk, "text", "")
+                if text:
+                    parts.append(text)
+                    yield {"chunk": text}
+
+            answer = "".join(parts)
+            snippet = self._find_relevant_snippet(
+                document_text, answer, question, snippet_index=snippet_index)
+            yield {"done": True, "snippet": snippet, "status": "success"}
+
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield {"done": True, "status": "error", "error": str(e)}
+
+    def generate_challenge_questions(self, document_text: str, count: int = 3,
+                                     cached_content=None) -> Dict[str, Any]:
         """
         Generate logic-based challenge questions from the document
 
         Args:
             document_text: Full document text
             count: Number of questions to generate
+            cached_content: Optional Gemini content cache holding the document
 
         Returns:
             Dictionary containing questions and correct answers
         """
         try:
-            prompt = f"""
-            Based on the following document, generate {count} challenging questions that test comprehension and logical reasoning. 
+            def build_prompt(include_document: bool) -> str:
+                document_section = f"""Document:
+            {document_text[:6000]}  # Limit for API constraints
+            """ if include_document else ""
+
+                return f"""
+            Based on the provided document, generate {count} challenging questions that test comprehension and logical reasoning.
             The questions should:
             1. Require understanding of the document's content
             2. Test logical reasoning and inference
             3. Have clear, verifiable answers from the document
             4. Be of varying difficulty levels
             5. Cover different aspects of the document
-            
-            Document:
-            {document_text[:6000]}  # Limit for API constraints
-            
-            Please provide exactly {count} questions in the following JSON format:
-            {{
-                "questions": [
-                    {{
-                        "question": "Your challenging question here",
-                        "correct_answer": "The correct answer based on the document",
-                        "explanation": "Detailed explanation of why this is correct, with document references",
-                        "difficulty": "easy/medium/hard"
-                    }}
-                ]
-            }}
-            
-            Make sure the JSON is valid and properly formatted.
+
+            {document_section}
+            Return exactly {count} questions as a JSON array where each item
+            contains "question", "correct_answer" (based on the document),
+            "explanation" (why it is correct, with document references), and
+            "difficulty" (easy, medium, or hard).
             """
 
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.5,  # Slightly higher for creativity
-                    max_output_tokens=Config.MAX_OUTPUT_TOKENS
-                )
+            response = self._generate_with_cache(
+                build_prompt,
+                generation_config=_GEN_CFG_CHALLENGE,
+                cached_content=cached_content
             )
 
-            response_text = response.text.strip()
-
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                questions_data = json.loads(json_str)
-
-                return {
-                    "questions": questions_data.get("questions", []),
-                    "status": "success"
-                }
-            else:
-                # Fallback: parse manually
-                questions = self._parse_questions_manually(
-                    response_text, count)
-                return {
-                    "questions": questions,
-                    "status": "success"
-                }
+            return {
+                "questions": json.loads(response.text),
+                "status": "success"
+            }
 
         except Exception as e:
             logger.error(f"Error generating challenge questions: {str(e)}")
@@ -235,7 +603,8 @@ class LLMService:
                 "error": str(e)
             }
 
-    def evaluate_answer(self, question: str, user_answer: str, correct_answer: str, document_text: str) -> Dict[str, Any]:
+    def evaluate_answer(self, question: str, user_answer: str, correct_answer: str, document_text: str,
+                        document_id: Optional[str] = None, cached_content=None) -> Dict[str, Any]:
         """
         Evaluate user's answer to a challenge question
 
@@ -244,65 +613,71 @@ class LLMService:
             user_answer: User's response
             correct_answer: Expected correct answer
             document_text: Full document text for reference
+            document_id: Document identifier used for semantic caching
+            cached_content: Optional Gemini content cache holding the document
 
         Returns:
             Dictionary containing evaluation results
         """
+        # Exact-match lookup only; see _eval_cache in __init__ for why
+        # semantic similarity is not safe for grading. correct_answer is
+        # part of the key because a regenerated challenge can repeat the
+        # question text with a different expected answer
+        cache_key = (document_id, question, user_answer, correct_answer)
+        if document_id:
+            with self._eval_cache_lock:
+                cached = self._eval_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+
         try:
-            prompt = f"""
-            Evaluate the user's answer to the following question based on the document content.
-            
-            Document context:
+            def build_prompt(include_document: bool) -> str:
+                document_section = f"""Document context:
             {document_text[:4000]}
-            
+            """ if include_document else ""
+
+                return f"""
+            Evaluate the user's answer to the following question based on the document content.
+
+            {document_section}
             Question: {question}
-            
+
             Correct Answer: {correct_answer}
-            
+
             User's Answer: {user_answer}
-            
-            Please evaluate the user's answer and provide:
-            1. A score from 0-100 (0 = completely wrong, 100 = perfectly correct)
-            2. Detailed feedback explaining what's correct/incorrect
-            3. Specific document references that support the evaluation
-            
-            Format your response as:
-            Score: [0-100]
-            
-            Feedback: [Detailed feedback here]
-            
-            Document Reference: [Specific references to support your evaluation]
+
+            Respond with a JSON object containing:
+            - "score": a number from 0-100 (0 = completely wrong, 100 = perfectly correct)
+            - "feedback": detailed feedback explaining what's correct/incorrect
+            - "reference": specific document references that support the evaluation
             """
 
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=Config.TEMPERATURE,
-                    max_output_tokens=1000
-                )
+            response = self._generate_with_cache(
+                build_prompt,
+                generation_config=_GEN_CFG_EVALUATE,
+                cached_content=cached_content
             )
 
-            response_text = response.text.strip()
-
-            # Parse score and feedback
-            score_match = re.search(r'Score:\s*(\d+)', response_text)
-            feedback_match = re.search(
-                r'Feedback:\s*(.*?)(?=\n\nDocument Reference:|$)', response_text, re.DOTALL)
-            reference_match = re.search(
-                r'Document Reference:\s*(.*?)$', response_text, re.DOTALL)
-
-            score = int(score_match.group(1)) if score_match else 0
-            feedback = feedback_match.group(1).strip(
-            ) if feedback_match else "Unable to evaluate"
-            reference = reference_match.group(1).strip(
-            ) if reference_match else "No specific reference"
-
-            return {
+            try:
+                data = json.loads(response.text)
+            except json.JSONDecodeError:
+                # Verbose feedback can hit max_output_tokens mid-JSON;
+                # surface the raw text instead of failing the request
+                data = {"feedback": response.text}
+            score = int(data.get("score", 0))
+            feedback = data.get("feedback", "Unable to evaluate").strip()
+            reference = data.get("reference", "No specific reference").strip()
+
+            result = {
                 "score": score,
                 "feedback": feedback,
                 "reference": reference,
                 "status": "success"
             }
+            if document_id:
+                with self._eval_cache_lock:
+                    self._eval_cache[cache_key] = dict(result)
+            return result
 
         except Exception as e:
             logger.error(f"Error evaluating answer: {str(e)}")
@@ -314,21 +689,79 @@ class LLMService:
                 "error": str(e)
             }
 
-    def _find_relevant_snippet(self, document_text: str, answer: str, question: str, max_length: int = 200) -> str:
-        """Find the most relevant snippet from the document that supports the answer"""
+    def build_snippet_index(self, document_text: str) -> Optional[Dict[str, Any]]:
+        """
+        Pre-index document sentences for fast snippet retrieval
+
+        Splits the document into sentences once and fits a TF-IDF matrix
+        over them, so per-question snippet scoring becomes a single sparse
+        matrix-vector product instead of a Python loop over every sentence.
+
+        Args:
+            document_text: Full document text
+
+        Returns:
+            Index dictionary for _find_relevant_snippet, or None if the
+            document has no scoreable sentences
+        """
         try:
-            # Split document into sentences
-            sentences = re.split(r'[.!?]+', document_text)
+            sentences = [s.strip() for s in _SENTENCE_SPLIT_RE.split(document_text)
+                         if len(s.strip()) >= 20]
+            if not sentences:
+                return None
 
-            # Find sentences that contain keywords from question or answer
-            question_words = set(question.lower().split())
-            answer_words = set(answer.lower().split())
-            all_keywords = question_words.union(answer_words)
+            vectorizer = TfidfVectorizer()
+            tfidf_matrix = vectorizer.fit_transform(sentences)
 
-            # Remove common words
-            common_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be',
-                            'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'}
-            keywords = all_keywords - common_words
+            return {
+                "sentences": sentences,
+                "vectorizer": vectorizer,
+                "tfidf_matrix": tfidf_matrix,
+                # Precomputed token sets for the keyword fallback
+                "token_sets": [frozenset(s.lower().split()) for s in sentences]
+            }
+
+        except Exception as e:
+            logger.warning(f"Failed to build snippet index: {str(e)}")
+            return None
+
+    def _find_relevant_snippet(self, document_text: str, answer: str, question: str, max_length: int = 200,
+                               snippet_index: Optional[Dict[str, Any]] = None) -> str:
+        """Find the most relevant snippet from the document that supports the answer"""
+        try:
+            keywords = (set(question.lower().split()) |
+                        set(answer.lower().split())) - _COMMON_WORDS
+
+            if snippet_index is not None:
+                # Score all sentences at once with the precomputed TF-IDF matrix
+                query_vec = snippet_index["vectorizer"].transform(
+                    [f"{question} {answer}"])
+                scores = (snippet_index["tfidf_matrix"] @ query_vec.T).toarray().ravel()
+
+                best_index = int(np.argmax(scores))
+                if scores[best_index] > 0:
+                    best_sentence = snippet_index["sentences"][best_index]
+                    if len(best_sentence) > max_length:
+                        best_sentence = best_sentence[:max_length] + "..."
+                    return best_sentence
+
+                # No TF-IDF overlap; score the precomputed token sets instead
+                token_sets = snippet_index["token_sets"]
+                overlaps = np.fromiter(
+                    (len(keywords & token_set) for token_set in token_sets),
+                    dtype=np.int32, count=len(token_sets))
+
+                best_index = int(np.argmax(overlaps))
+                if overlaps[best_index] == 0:
+                    return ""
+
+                best_sentence = snippet_index["sentences"][best_index]
+                if len(best_sentence) > max_length:
+                    best_sentence = best_sentence[:max_length] + "..."
+                return best_sentence
+
+            # Split document into sentences
+            sentences = _SENTENCE_SPLIT_RE.split(document_text)
 
             # Score sentences based on keyword overlap
             best_sentence = ""
@@ -354,31 +787,3 @@ class LLMService:
         except Exception as e:
             logger.error(f"Error finding relevant snippet: {str(e)}")
             return ""
-
-    def _parse_questions_manually(self, response_text: str, count: int) -> List[Dict]:
-        """Manually parse questions if JSON parsing fails"""
-        questions = []
-
-        # Simple regex patterns to extract questions
-        question_patterns = [
-            r'(?:Question|Q)[\s\d]*[:.]?\s*(.+?)(?=\n|$)',
-            r'(\d+\.?\s*.+\?)',
-            r'(.+\?)'
-        ]
-
-        for pattern in question_patterns:
-            matches = re.findall(pattern, response_text, re.MULTILINE)
-            for match in matches:
-                if len(questions) >= count:
-                    break
-
-                question_text = match.strip()
-                if len(question_text) > 10 and '?' in question_text:
-                    questions.append({
-                        "question": question_text,
-                        "correct_answer": "Please refer to the document for the answer",
-                        "explanation": "Generated from document analysis",
-                        "difficulty": "medium"
-                    })
-
-        return questions[:count]
@@ -1,28 +1,54 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 import uvicorn
+import hashlib
 import logging
+import orjson
+import os
+import tempfile
+import threading
+import time
 from datetime import datetime
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from cachetools import TTLCache
+from pydantic import ValidationError
 
 # Import our modules
 from backend.config import Config
 from backend.document_processor import DocumentProcessor
-from backend.llm_service import LLMService
+from backend.document_store import DocRecord, DocumentStore
+from backend.llm_service import LLMService, configure_genai
 from backend.api_models import *
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Validate configuration and set up the Gemini client once per process"""
+    try:
+        Config.validate_config()
+        configure_genai()
+        logger.info("Application started successfully")
+    except Exception as e:
+        logger.error(f"Failed to start application: {str(e)}")
+        raise
+    yield
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Smart Research Assistant API",
     description="AI-powered document analysis and question answering system",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -37,30 +63,83 @@ app.add_middleware(
 # Initialize services
 document_processor = DocumentProcessor()
 llm_service = LLMService()
-
-# In-memory storage for documents and sessions
-documents_storage: Dict[str, Dict[str, Any]] = {}
+document_store = DocumentStore()
+
+# Bounded in-memory document cache; cold entries are rehydrated from the
+# on-disk DocumentStore, so resident memory stays capped under sustained
+# upload traffic
+documents_storage: TTLCache = TTLCache(
+    maxsize=Config.DOCUMENT_CACHE_MAXSIZE,
+    ttl=Config.DOCUMENT_CACHE_TTL_SECONDS)
+# TTLCache is not thread-safe and batch jobs touch it from worker
+# threads, so every access goes through this lock
+documents_lock = threading.Lock()
 sessions_storage: Dict[str, SessionData] = {}
 
+# Storage for async batch jobs (summaries, challenge questions). The
+# dict is a per-process fast path; job state is also persisted to disk
+# so a status poll routed to a different uvicorn worker still resolves
+batch_jobs_storage: Dict[str, Dict[str, Any]] = {}
+batch_jobs_dir = Path("batch_jobs")
+batch_jobs_dir.mkdir(parents=True, exist_ok=True)
+
+# Strong references to in-flight job tasks; the event loop only keeps
+# weak ones, so an unreferenced task can be garbage-collected mid-run
+_batch_tasks: set = set()
+
+# SHA-256 content hash -> document_id, so re-uploads are answered in O(1)
+content_hash_index: Dict[str, str] = {}
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize the application"""
-    try:
-        Config.validate_config()
-        logger.info("Application started successfully")
-    except Exception as e:
-        logger.error(f"Failed to start application: {str(e)}")
-        raise
 
+# Serialized once; /health is hit by load balancers and should not pay
+# per-call model construction and datetime formatting
+_HEALTH_BODY = orjson.dumps(HealthResponse().model_dump())
 
-@app.get("/health", response_model=HealthResponse)
+
+@app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return HealthResponse()
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
 
+def _get_document(document_id: str) -> Dict[str, Any]:
+    """
+    Fetch a document, lazily rehydrating evicted entries from disk
 
-@app.post("/upload", response_model=DocumentUploadResponse)
+    Raises a 404 when the document is unknown to both the bounded
+    in-memory cache and the on-disk store.
+    """
+    with documents_lock:
+        document = documents_storage.get(document_id)
+    if document is not None:
+        return document
+
+    record = document_store.load(document_id)
+    text = document_store.get_text(document_id) if record else None
+    if record is None or text is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    document = {
+        "id": record.id,
+        "filename": record.filename,
+        "file_type": record.file_type,
+        "text": text,
+        "word_count": record.word_count,
+        "char_count": record.char_count,
+        "summary": record.summary,
+        "content_hash": None,
+        "cached_content": None,
+        "snippet_index": llm_service.build_snippet_index(text),
+        "upload_timestamp": record.upload_timestamp,
+        "status": "ready"
+    }
+    with documents_lock:
+        documents_storage[document_id] = document
+    logger.info(f"Rehydrated document {document_id} from disk")
+    return document
+
+
+@app.post("/upload")
 async def upload_document(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...)
@@ -73,30 +152,76 @@ async def upload_document(
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file provided")
 
-        # Check file size
-        file_content = await file.read()
-        if len(file_content) > Config.MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Maximum size: {Config.MAX_FILE_SIZE/1024/1024}MB"
-            )
+        # Stream the upload in 1 MiB chunks, hashing as we read and
+        # aborting as soon as the size limit is exceeded
+        content_hash = hashlib.sha256()
+        file_size = 0
+        tmp_file = tempfile.SpooledTemporaryFile(
+            max_size=Config.MAX_FILE_SIZE)
+        while chunk := await file.read(1 << 20):
+            file_size += len(chunk)
+            if file_size > Config.MAX_FILE_SIZE:
+                tmp_file.close()
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large. Maximum size: {Config.MAX_FILE_SIZE/1024/1024}MB"
+                )
+            content_hash.update(chunk)
+            tmp_file.write(chunk)
+        content_hash = content_hash.hexdigest()
+
+        # Identical content already processed: reuse the existing document
+        # instead of re-parsing and re-summarizing it
+        existing_id = content_hash_index.get(content_hash)
+        if existing_id:
+            try:
+                existing = _get_document(existing_id)
+            except HTTPException:
+                existing = None
+        else:
+            existing = None
+        if existing is not None:
+            tmp_file.close()
+            logger.info(
+                f"Duplicate upload of {file.filename}, reusing document {existing_id}")
+            return DocumentUploadResponse.model_construct(
+                status="success",
+                message="Document already uploaded",
+                document_id=existing_id,
+                filename=existing["filename"],
+                word_count=existing["word_count"],
+                char_count=existing["char_count"],
+                file_type=existing["file_type"],
+                summary=existing["summary"]
+            ).model_dump()
 
         # Generate document ID
         document_id = str(uuid.uuid4())
 
-        # Process document
-        processed_doc = document_processor.process_document(
-            file_content, file.filename)
+        # Parse the document in a worker thread so PDF/DOCX extraction
+        # does not stall the event loop
+        try:
+            processed_doc = await asyncio.to_thread(
+                document_processor.process_document_file, tmp_file, file.filename)
+        finally:
+            tmp_file.close()
 
         if processed_doc["status"] == "error":
             raise HTTPException(status_code=400, detail=processed_doc["error"])
 
-        # Generate summary
-        summary_result = llm_service.generate_summary(processed_doc["text"])
+        # Run the Gemini summary, content caching, and CPU-bound sentence
+        # indexing concurrently; wall time is the max of the three, not the sum
+        summary_result, cached_content, snippet_index = await asyncio.gather(
+            llm_service.generate_summary_async(processed_doc["text"]),
+            asyncio.to_thread(
+                llm_service.create_document_cache, processed_doc["text"]),
+            asyncio.to_thread(
+                llm_service.build_snippet_index, processed_doc["text"])
+        )
         summary = summary_result.get("summary", "Summary generation failed")
 
         # Store document
-        documents_storage[document_id] = {
+        document = {
             "id": document_id,
             "filename": processed_doc["filename"],
             "file_type": processed_doc["file_type"],
@@ -104,13 +229,33 @@ async def upload_document(
             "word_count": processed_doc["word_count"],
             "char_count": processed_doc["char_count"],
             "summary": summary,
+            "content_hash": content_hash,
+            "cached_content": cached_content,
+            "snippet_index": snippet_index,
             "upload_timestamp": datetime.now(),
             "status": "ready"
         }
+        with documents_lock:
+            documents_storage[document_id] = document
+        content_hash_index[content_hash] = document_id
+
+        # Persist the record and raw text so state survives restarts
+        document_store.save(
+            DocRecord(
+                id=document_id,
+                filename=processed_doc["filename"],
+                file_type=processed_doc["file_type"],
+                word_count=processed_doc["word_count"],
+                char_count=processed_doc["char_count"],
+                summary=summary,
+                upload_timestamp=document["upload_timestamp"].isoformat()
+            ),
+            processed_doc["text"]
+        )
 
         logger.info(f"Document uploaded and processed: {document_id}")
 
-        return DocumentUploadResponse(
+        return DocumentUploadResponse.model_construct(
             status="success",
             message="Document uploaded and processed successfully",
             document_id=document_id,
@@ -119,7 +264,7 @@ async def upload_document(
             char_count=processed_doc["char_count"],
             file_type=processed_doc["file_type"],
             summary=summary
-        )
+        ).model_dump()
 
     except HTTPException:
         raise
@@ -129,35 +274,50 @@ async def upload_document(
             status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@app.post("/ask", response_model=QuestionResponse)
-async def ask_question(request: QuestionRequest):
+async def _parse_request(request: Request, model):
+    """
+    Parse the raw request body straight into a model
+
+    model_validate_json parses and validates JSON in a single pass inside
+    pydantic's Rust core, avoiding the intermediate dict FastAPI would
+    otherwise build.
+    """
+    try:
+        return model.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.post("/ask")
+async def ask_question(request: Request):
     """
     Ask a question about the uploaded document
     """
     try:
-        # Validate document exists
-        if request.document_id not in documents_storage:
-            raise HTTPException(status_code=404, detail="Document not found")
+        req = await _parse_request(request, QuestionRequest)
 
-        document = documents_storage[request.document_id]
+        document = _get_document(req.document_id)
 
         # Get answer from LLM
         result = llm_service.answer_question(
-            question=request.question,
+            question=req.question,
             document_text=document["text"],
-            conversation_history=request.conversation_history
+            conversation_history=req.conversation_history,
+            document_id=req.document_id,
+            cached_content=document.get("cached_content"),
+            snippet_index=document.get("snippet_index")
         )
 
         if result["status"] == "error":
             raise HTTPException(status_code=500, detail=result.get(
                 "error", "Failed to process question"))
 
-        return QuestionResponse(
+        return QuestionResponse.model_construct(
             answer=result["answer"],
             justification=result["justification"],
             snippet=result["snippet"],
             status="success"
-        )
+        ).model_dump()
 
     except HTTPException:
         raise
@@ -167,35 +327,60 @@ async def ask_question(request: QuestionRequest):
             status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@app.post("/challenge", response_model=ChallengeQuestionsResponse)
-async def generate_challenge_questions(request: ChallengeQuestionsRequest):
+@app.post("/ask/stream")
+async def ask_question_stream(request: Request):
+    """
+    Ask a question and stream the answer over Server-Sent Events
+
+    Emits data: {"chunk": ...} events as tokens arrive, then a final
+    data: {"done": true, "snippet": ...} event after the stream closes.
+    """
+    req = await _parse_request(request, QuestionRequest)
+
+    document = _get_document(req.document_id)
+
+    def event_stream():
+        for event in llm_service.answer_question_stream(
+            question=req.question,
+            document_text=document["text"],
+            conversation_history=req.conversation_history,
+            cached_content=document.get("cached_content"),
+            snippet_index=document.get("snippet_index")
+        ):
+            yield f"data: {orjson.dumps(event).decode()}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.post("/challenge")
+async def generate_challenge_questions(request: Request):
     """
     Generate challenge questions based on the document
     """
     try:
-        # Validate document exists
-        if request.document_id not in documents_storage:
-            raise HTTPException(status_code=404, detail="Document not found")
+        req = await _parse_request(request, ChallengeQuestionsRequest)
 
-        document = documents_storage[request.document_id]
+        document = _get_document(req.document_id)
 
         # Generate challenge questions
         result = llm_service.generate_challenge_questions(
             document_text=document["text"],
-            count=request.count
+            count=req.count,
+            cached_content=document.get("cached_content")
         )
 
         if result["status"] == "error":
             raise HTTPException(status_code=500, detail=result.get(
                 "error", "Failed to generate questions"))
 
-        questions = [ChallengeQuestion(**q) for q in result["questions"]]
+        questions = [ChallengeQuestion.model_construct(**q)
+                     for q in result["questions"]]
 
-        return ChallengeQuestionsResponse(
+        return ChallengeQuestionsResponse.model_construct(
             questions=questions,
             status="success",
-            document_id=request.document_id
-        )
+            document_id=req.document_id
+        ).model_dump()
 
     except HTTPException:
         raise
@@ -205,36 +390,36 @@ async def generate_challenge_questions(request: ChallengeQuestionsRequest):
             status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@app.post("/evaluate", response_model=EvaluateAnswerResponse)
-async def evaluate_answer(request: EvaluateAnswerRequest):
+@app.post("/evaluate")
+async def evaluate_answer(request: Request):
     """
     Evaluate user's answer to a challenge question
     """
     try:
-        # Validate document exists
-        if request.document_id not in documents_storage:
-            raise HTTPException(status_code=404, detail="Document not found")
+        req = await _parse_request(request, EvaluateAnswerRequest)
 
-        document = documents_storage[request.document_id]
+        document = _get_document(req.document_id)
 
         # Evaluate answer
         result = llm_service.evaluate_answer(
-            question=request.question,
-            user_answer=request.user_answer,
-            correct_answer=request.correct_answer,
-            document_text=document["text"]
+            question=req.question,
+            user_answer=req.user_answer,
+            correct_answer=req.correct_answer,
+            document_text=document["text"],
+            document_id=req.document_id,
+            cached_content=document.get("cached_content")
         )
 
         if result["status"] == "error":
             raise HTTPException(status_code=500, detail=result.get(
                 "error", "Failed to evaluate answer"))
 
-        return EvaluateAnswerResponse(
+        return EvaluateAnswerResponse.model_construct(
             score=result["score"],
             feedback=result["feedback"],
             reference=result["reference"],
             status="success"
-        )
+        ).model_dump()
 
     except HTTPException:
         raise
@@ -244,26 +429,231 @@ async def evaluate_answer(request: EvaluateAnswerRequest):
             status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+def _persist_batch_job(job: Dict[str, Any]):
+    """Write a job's state to disk so any worker process can serve polls"""
+    try:
+        (batch_jobs_dir / f"{job['job_id']}.json").write_bytes(
+            orjson.dumps(job))
+    except Exception as e:
+        logger.error(f"Failed to persist batch job {job['job_id']}: {str(e)}")
+
+
+def _prune_batch_jobs():
+    """Drop job records older than the retention window"""
+    cutoff = time.time() - Config.BATCH_JOB_TTL_SECONDS
+    try:
+        for path in batch_jobs_dir.glob("*.json"):
+            if path.stat().st_mtime < cutoff:
+                batch_jobs_storage.pop(path.stem, None)
+                path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.error(f"Failed to prune batch jobs: {str(e)}")
+
+
+def _load_batch_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Load a job's persisted state, or None if it was never submitted"""
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        return None
+
+    path = batch_jobs_dir / f"{job_id}.json"
+    if not path.exists():
+        return None
+    try:
+        return orjson.loads(path.read_bytes())
+    except Exception as e:
+        logger.error(f"Failed to load batch job {job_id}: {str(e)}")
+        return None
+
+
+def _submit_batch_job(document_ids, worker) -> BatchJobResponse:
+    """
+    Create a batch job record and schedule it off the hot path
+
+    Args:
+        document_ids: Documents to process
+        worker: Callable taking a document_id and returning a result dict
+
+    Returns:
+        BatchJobResponse describing the submitted job
+    """
+    with documents_lock:
+        unknown = [doc_id for doc_id in document_ids
+                   if doc_id not in documents_storage]
+    missing = [doc_id for doc_id in unknown
+               if document_store.load(doc_id) is None]
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Documents not found: {', '.join(missing)}")
+
+    _prune_batch_jobs()
+
+    job_id = str(uuid.uuid4())
+    job = {
+        "job_id": job_id,
+        "status": "pending",
+        "document_ids": list(document_ids),
+        "results": {},
+        "submitted_at": datetime.now().isoformat()
+    }
+    batch_jobs_storage[job_id] = job
+    _persist_batch_job(job)
+
+    task = asyncio.get_running_loop().create_task(
+        _run_batch_job(job_id, document_ids, worker))
+    _batch_tasks.add(task)
+    task.add_done_callback(_batch_tasks.discard)
+
+    return BatchJobResponse.model_construct(
+        job_id=job_id,
+        status="pending",
+        document_ids=list(document_ids)
+    ).model_dump()
+
+
+async def _run_batch_job(job_id: str, document_ids, worker):
+    """Run a batch job, fanning document work out to worker threads"""
+    job = batch_jobs_storage[job_id]
+    job["status"] = "running"
+    _persist_batch_job(job)
+    try:
+        tasks = [asyncio.to_thread(worker, doc_id) for doc_id in document_ids]
+        results = await asyncio.gather(*tasks)
+        job["results"] = dict(zip(document_ids, results))
+        job["status"] = "completed"
+    except Exception as e:
+        logger.error(f"Batch job {job_id} failed: {str(e)}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    _persist_batch_job(job)
+
+
+@app.post("/evaluate_batch")
+async def evaluate_answers_batch(request: Request):
+    """
+    Evaluate several answers against one document in a single call
+
+    Items are evaluated concurrently and results are returned in request
+    order, amortizing the network round-trip over the whole batch.
+    """
+    try:
+        req = await _parse_request(request, BatchEvaluateRequest)
+
+        document = _get_document(req.document_id)
+
+        results = await asyncio.gather(*[
+            asyncio.to_thread(
+                llm_service.evaluate_answer,
+                question=item.question,
+                user_answer=item.user_answer,
+                correct_answer=item.correct_answer,
+                document_text=document["text"],
+                document_id=req.document_id,
+                cached_content=document.get("cached_content")
+            )
+            for item in req.items
+        ])
+
+        return {
+            "results": [
+                EvaluateAnswerResponse.model_construct(
+                    score=result.get("score", 0),
+                    feedback=result.get("feedback", "Unable to evaluate"),
+                    reference=result.get("reference", "No specific reference"),
+                    status=result["status"]
+                ).model_dump()
+                for result in results
+            ],
+            "status": "success"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error evaluating answer batch: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@app.post("/summarize-batch")
+async def summarize_batch(request: BatchSummaryRequest):
+    """
+    Generate summaries for many documents as an async batch job
+    """
+    def worker(doc_id: str):
+        return llm_service.generate_summary(_get_document(doc_id)["text"])
+
+    return _submit_batch_job(request.document_ids, worker)
+
+
+@app.post("/challenge-batch")
+async def challenge_batch(request: BatchChallengeRequest):
+    """
+    Generate challenge questions for many documents as an async batch job
+    """
+    def worker(doc_id: str):
+        document = _get_document(doc_id)
+        return llm_service.generate_challenge_questions(
+            document_text=document["text"],
+            count=request.count,
+            cached_content=document.get("cached_content")
+        )
+
+    return _submit_batch_job(request.document_ids, worker)
+
+
+@app.get("/batch/{job_id}")
+async def get_batch_job(job_id: str):
+    """
+    Poll the status and results of a batch job
+    """
+    # Jobs run in the worker process that accepted the POST; a poll can
+    # land on any worker, so fall back to the persisted state on disk
+    job = batch_jobs_storage.get(job_id) or _load_batch_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return BatchJobStatusResponse.model_construct(
+        job_id=job_id,
+        status=job["status"],
+        results=job["results"],
+        error=job.get("error")
+    ).model_dump()
+
+
 @app.get("/document/{document_id}")
 async def get_document_info(document_id: str):
     """
     Get information about a specific document
     """
     try:
-        if document_id not in documents_storage:
+        with documents_lock:
+            document = documents_storage.get(document_id)
+        if document is not None:
+            return DocumentInfo.model_construct(
+                document_id=document_id,
+                filename=document["filename"],
+                file_type=document["file_type"],
+                word_count=document["word_count"],
+                char_count=document["char_count"],
+                upload_timestamp=document["upload_timestamp"],
+                summary=document["summary"]
+            ).model_dump()
+
+        # Fall back to the on-disk record; msgspec decode, no pydantic
+        record = document_store.load(document_id)
+        if record is None:
             raise HTTPException(status_code=404, detail="Document not found")
 
-        document = documents_storage[document_id]
-
-        return DocumentInfo(
-            document_id=document_id,
-            filename=document["filename"],
-            file_type=document["file_type"],
-            word_count=document["word_count"],
-            char_count=document["char_count"],
-            upload_timestamp=document["upload_timestamp"],
-            summary=document["summary"]
-        )
+        return {
+            "document_id": record.id,
+            "filename": record.filename,
+            "file_type": record.file_type,
+            "word_count": record.word_count,
+            "char_count": record.char_count,
+            "upload_timestamp": record.upload_timestamp,
+            "summary": record.summary
+        }
 
     except HTTPException:
         raise
@@ -279,10 +669,12 @@ async def delete_document(document_id: str):
     Delete a document from storage
     """
     try:
-        if document_id not in documents_storage:
+        with documents_lock:
+            in_memory = documents_storage.pop(document_id, None) is not None
+        if not in_memory and document_store.load(document_id) is None:
             raise HTTPException(status_code=404, detail="Document not found")
 
-        del documents_storage[document_id]
+        document_store.delete(document_id)
         logger.info(f"Document deleted: {document_id}")
 
         return {"status": "success", "message": "Document deleted successfully"}
@@ -299,12 +691,12 @@ async def delete_document(document_id: str):
 async def global_exception_handler(request, exc):
     """Global exception handler"""
     logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=ErrorResponse(
             message="An unexpected error occurred",
             error_code="INTERNAL_ERROR"
-        ).dict()
+        ).model_dump()
     )
 
 if __name__ == "__main__":
@@ -312,6 +704,10 @@ if __name__ == "__main__":
         "main:app",
         host=Config.FASTAPI_HOST,
         port=Config.FASTAPI_PORT,
-        reload=True,
+        reload=False,
+        workers=os.cpu_count(),
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
         log_level="info"
     )
@@ -1,13 +1,16 @@
 import streamlit as st
 import requests
-import json
+from requests.adapters import HTTPAdapter, Retry
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+import orjson
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, Any, List
-import time
 from datetime import datetime
-import plotly.graph_objects as go
-import plotly.express as px
 from streamlit_option_menu import option_menu
 import logging
+import re
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,148 +20,583 @@ logger = logging.getLogger(__name__)
 API_BASE_URL = "http://localhost:8000"
 SUPPORTED_FORMATS = ['.pdf', '.txt', '.docx']
 
+# Mirrors the backend's upload cap so oversized files fail fast locally
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
 
-class SmartAssistantUI:
-    """Main UI class for the Smart Research Assistant"""
+# Exports are indented for readability; NON_STR_KEYS covers the
+# int-keyed challenge score dict
+_EXPORT_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
 
-    def __init__(self):
-        self.setup_page_config()
-        self.initialize_session_state()
+# (connect, read) timeout applied to every API call
+REQUEST_TIMEOUT = (3.05, 60)
 
-    def setup_page_config(self):
-        """Configure Streamlit page settings"""
-        st.set_page_config(
-            page_title="Smart Research Assistant",
-            page_icon="🧠",
-            layout="wide",
-            initial_sidebar_state="expanded"
-        )
+# Conversation-history entries rendered per page
+HISTORY_PAGE_SIZE = 10
 
-        # Custom CSS for better styling
-        st.markdown("""
-       <style>
-            body {
-                background-color: #e8f5e9;
-                font-family: 'Segoe UI', sans-serif;
-            }
+# Per-difficulty accent colors for st.markdown's lightweight
+# colored-text syntax
+DIFFICULTY_TEXT_COLORS = {
+    'easy': 'green',
+    'medium': 'orange',
+    'hard': 'red'
+}
 
-            .main-header {
-                background: linear-gradient(90deg, #43cea2 0%, #185a9d 100%);
-                padding: 2rem 1rem;
-                border-radius: 12px;
-                color: white;
-                text-align: center;
-                box-shadow: 0 4px 14px rgba(0,0,0,0.15);
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """Shared pooled HTTP session
+
+    Cached as a resource so the warm connection pool survives reruns
+    and is shared across user sessions instead of paying a fresh
+    TCP handshake per request.
+    """
+    session = requests.Session()
+    # Retries cover connection setup and gateway errors only; read=0
+    # avoids replaying a request whose LLM call may already be running
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, connect=2, read=0,
+                          backoff_factor=0.25,
+                          status_forcelist=(502, 503, 504),
+                          allowed_methods=frozenset(['GET', 'POST'])))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+@st.cache_data
+def _filter_history(search_term: str, document_id: str, history_len: int,
+                    last_ts: int, _history: List[Dict]) -> List[Dict]:
+    """Filter history by search term, cached per (term, document, history)
+
+    The history list itself is passed unhashed; the cache is global
+    across sessions, so the document id and the last entry's timestamp
+    join the key to keep one conversation's results from leaking into
+    another with the same length.
+    """
+    term = search_term.lower()
+    return [
+        exchange for exchange in _history
+        if term in exchange['question'].lower() or
+        term in exchange['answer'].lower()
+    ]
+
+
+# Filler words excluded from rubric keyword sets
+_RUBRIC_STOPWORDS = frozenset([
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'in', 'on', 'at', 'to',
+    'of', 'and', 'or', 'for', 'with', 'by', 'that', 'this', 'it', 'as',
+    'be', 'from', 'which', 'has', 'have', 'their', 'its', 'they', 'can'
+])
+
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _tokenize(text: str) -> frozenset:
+    """Lowercased word set with punctuation stripped"""
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+
+def _build_rubric(question_data: Dict) -> frozenset:
+    """Keyword set distilled from a question's correct answer and explanation"""
+    text = f"{question_data.get('correct_answer', '')} " \
+           f"{question_data.get('explanation', '')}"
+    return frozenset(
+        word for word in _tokenize(text)
+        if len(word) > 3 and word not in _RUBRIC_STOPWORDS
+    )
+
+
+def _score_locally(question_data: Dict, rubric: frozenset,
+                   user_answer: str) -> Dict | None:
+    """Score an answer client-side via rubric keyword overlap
+
+    Returns an evaluation dict only when the overlap is decisively
+    high; None means the answer needs the backend evaluator. Low or
+    zero overlap is not evidence of a wrong answer — a terse correct
+    answer ("No", a date) shares no rubric keywords — so those always
+    go to the backend.
+    """
+    if not rubric:
+        return None
+
+    user_tokens = _tokenize(user_answer)
+    overlap = len(user_tokens & rubric) / len(rubric)
+
+    if overlap >= 0.6:
+        return {
+            "score": min(100, round(overlap * 100)),
+            "feedback": "Your answer covers the key points. "
+                        f"{question_data.get('explanation', '')}",
+            "reference": question_data.get('correct_answer', '')
+        }
+    return None
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _ask_api(document_id: str, question: str, history_key: tuple) -> Dict:
+    """POST /ask, cached by (document, question, recent history)
+
+    Repeating the same question skips the backend (and the LLM call)
+    entirely for an hour.
+    """
+    response = get_http_session().post(
+        f"{API_BASE_URL}/ask",
+        json={
+            "document_id": document_id,
+            "question": question,
+            "conversation_history": [{"q": q, "a": a} for q, a in history_key]
+        },
+        timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _challenge_api(document_id: str, count: int, difficulty: str,
+                   generation: int) -> Dict:
+    """POST /challenge, cached by (document, count, difficulty, generation)
+
+    The endpoint is intentionally non-deterministic, so the generation
+    counter bumps on every explicit request for new questions; reruns
+    within the same generation reuse the cached set while regeneration
+    always reaches the backend.
+    """
+    response = get_http_session().post(
+        f"{API_BASE_URL}/challenge",
+        json={
+            "document_id": document_id,
+            "count": count,
+            "difficulty": difficulty
+        },
+        timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+@st.cache_data(ttl=3600, max_entries=512, show_spinner=False)
+def _post_evaluate(document_id: str, question: str, user_answer: str,
+                   correct_answer: str) -> Dict:
+    """POST /evaluate, cached by the full submission
+
+    Resubmitting the same answer returns the stored evaluation instead
+    of paying another round-trip plus LLM evaluation.
+    """
+    response = get_http_session().post(
+        f"{API_BASE_URL}/evaluate",
+        json={
+            "document_id": document_id,
+            "question": question,
+            "user_answer": user_answer,
+            "correct_answer": correct_answer
+        },
+        timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+@st.cache_data(show_spinner=False)
+def compute_analytics(scores_key: tuple, lengths_key: tuple,
+                      timestamps_key: tuple) -> Dict[str, Any]:
+    """Vectorized session statistics
+
+    Cached on tuples of the raw inputs, so reruns that don't change the
+    history or scores skip the reductions entirely; inside, NumPy
+    replaces the per-item Python loops.
+    """
+    import numpy as np
+
+    stats: Dict[str, Any] = {}
+
+    if scores_key:
+        # Scores are 0-100, so int8 is plenty and keeps reductions compact
+        scores = np.fromiter(scores_key, dtype=np.int8)
+        stats['scores'] = scores
+        stats['avg_score'] = float(scores.mean())
+        stats['max_score'] = int(scores.max())
+        stats['min_score'] = int(scores.min())
+        stats['score_range'] = stats['max_score'] - stats['min_score']
+
+    if timestamps_key:
+        # Entries carry epoch seconds, so the hour-of-day and duration
+        # come from integer arithmetic instead of any datetime parsing.
+        # Epochs are UTC; shift by the local offset so the chart shows
+        # the same wall-clock hours as the display timestamps
+        ts = np.fromiter(timestamps_key, dtype=np.int64)
+        utc_offset = int(
+            datetime.now().astimezone().utcoffset().total_seconds())
+        hours = (((ts + utc_offset) // 3600) % 24).astype(np.int8)
+        # Fixed 24-bucket count in a single C-level pass; empty hours
+        # keep their slot so the chart's x-axis stays in order
+        stats['hours'] = np.arange(24)
+        stats['hour_counts'] = np.bincount(hours, minlength=24)
+        stats['duration_min'] = int((ts[-1] - ts[0]) // 60)
+
+    if lengths_key:
+        lengths = np.fromiter(lengths_key, dtype=np.int32)
+        stats['question_lengths'] = lengths
+        stats['avg_question_length'] = float(lengths.mean())
+
+    return stats
+
+
+@st.cache_data(show_spinner=False)
+def _build_score_bar(indices_key: tuple, scores_key: tuple):
+    """Per-question score bar chart, rebuilt only when scores change"""
+    import numpy as np
+
+    go = _plotly()
+    scores = np.fromiter(scores_key, dtype=np.int8)
+    fig = go.Figure(data=[go.Bar(
+        x=[f"Q{i+1}" for i in indices_key],
+        y=scores,
+        # Branchless colour pick instead of a per-score Python conditional
+        marker_color=np.where(
+            scores >= 80, '#28a745',
+            np.where(scores >= 60, '#ffc107', '#dc3545')).tolist(),
+        text=scores,
+        textposition='auto'
+    )])
+    fig.update_layout(
+        title="Challenge Question Scores",
+        xaxis_title="Question",
+        yaxis_title="Score"
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _build_gauge(avg_score: float):
+    """Average-score gauge, rebuilt only when the average changes"""
+    go = _plotly()
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=avg_score,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Average Score"},
+        gauge={
+            'axis': {'range': [None, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 60], 'color': "lightgray"},
+                {'range': [60, 80], 'color': "yellow"},
+                {'range': [80, 100], 'color': "green"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 90
             }
+        }
+    ))
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _build_hour_bar(hours_key: tuple, counts_key: tuple):
+    """Questions-by-hour bar chart"""
+    go = _plotly()
+    fig = go.Figure(data=[go.Bar(
+        x=list(hours_key),
+        y=list(counts_key),
+        marker_color='#667eea'
+    )])
+    fig.update_layout(
+        title="Questions Asked by Hour",
+        xaxis_title="Hour of Day",
+        yaxis_title="Number of Questions",
+        height=300
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _build_length_hist(lengths_key: tuple):
+    """Question-length histogram"""
+    go = _plotly()
+    fig = go.Figure(data=[go.Histogram(
+        x=list(lengths_key),
+        nbinsx=10,
+        marker_color='#764ba2'
+    )])
+    fig.update_layout(
+        title="Question Length Distribution",
+        xaxis_title="Words in Question",
+        yaxis_title="Frequency",
+        height=300
+    )
+    return fig
+
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for dispatching independent API calls in parallel
+
+    Streamlit reruns are single-threaded, so serial POSTs cost the sum
+    of their latencies; fanning out over the pool costs the max.
+    """
+    return ThreadPoolExecutor(max_workers=4)
+
+
+def _evaluate_one(item: Dict) -> Dict:
+    """Plain single-answer /evaluate POST, safe to run off the main thread"""
+    response = get_http_session().post(
+        f"{API_BASE_URL}/evaluate", json=item, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+@st.cache_resource
+def _plotly():
+    """Import plotly on first use
+
+    Plotly dominates cold start and is only needed on the Analytics
+    page, so the import is deferred until a chart is actually drawn.
+    The shared layout template is registered here once, so the figure
+    builders don't repeat (and Plotly doesn't re-merge) the same
+    height/legend/margin settings per figure.
+    """
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    pio.templates["smart_assistant"] = go.layout.Template(
+        layout=dict(height=400, showlegend=False,
+                    margin=dict(l=40, r=20, t=40, b=40)))
+    pio.templates.default = "plotly+smart_assistant"
+    return go
+
+
+def _avg_challenge_score() -> float:
+    """Running mean of challenge scores, maintained in O(1) per update"""
+    n = st.session_state.challenge_score_n
+    return st.session_state.challenge_score_sum / n if n else 0.0
+
+
+@st.cache_data(show_spinner=False)
+def _doc_summary(document_id: str, _info: Dict) -> str:
+    """Document summary string, cached per document"""
+    return _info['summary']
+
+
+@st.cache_data(show_spinner=False)
+def _doc_stat_lines(document_id: str, _info: Dict) -> List[str]:
+    """Pre-formatted sidebar stat lines, built once per document"""
+    return [
+        f"**Filename:** {_info['filename']}",
+        f"**Type:** {_info['file_type']}",
+        f"**Words:** {_info['word_count']:,}",
+        f"**Characters:** {_info['char_count']:,}",
+    ]
+
+
+@st.cache_resource
+def _css_block() -> str:
+    """Custom CSS for better styling, built once per process"""
+    return """
+   <style>
+        body {
+            background-color: #e8f5e9;
+            font-family: 'Segoe UI', sans-serif;
+        }
 
-            .upload-section {
-                background: #f1f8e9;
-                padding: 2rem;
-                border-radius: 12px;
-                border: 2px dashed #66bb6a;
-                color: #2e7d32;
-                transition: 0.3s ease;
-            }
+        .main-header {
+            background: linear-gradient(90deg, #43cea2 0%, #185a9d 100%);
+            padding: 2rem 1rem;
+            border-radius: 12px;
+            color: white;
+            text-align: center;
+            box-shadow: 0 4px 14px rgba(0,0,0,0.15);
+        }
 
-            .upload-section:hover {
-                border-color: #388e3c;
-            }
+        .upload-section {
+            background: #f1f8e9;
+            padding: 2rem;
+            border-radius: 12px;
+            border: 2px dashed #66bb6a;
+            color: #2e7d32;
+            transition: 0.3s ease;
+        }
 
-            .question-card {
-                background: #ffffff;
-                border-left: 6px solid #8bc34a;
-                padding: 1.5rem;
-                border-radius: 10px;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            }
+        .upload-section:hover {
+            border-color: #388e3c;
+        }
 
-            .answer-card {
-                background: #e0f2f1;
-                border-left: 6px solid #26a69a;
-                padding: 1.5rem;
-                border-radius: 10px;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.08);
-                color: #212121 !important;  /* Fix for dark mode */
-            }
+        .question-card {
+            background: #ffffff;
+            border-left: 6px solid #8bc34a;
+            padding: 1.5rem;
+            border-radius: 10px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }
 
-            .challenge-card {
-                background: #fffde7;
-                border-left: 6px solid #fbc02d;
-                padding: 1.5rem;
-                border-radius: 10px;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.08);
-                color: #212121 !important;  /* Dark readable text */
+        .answer-card {
+            background: #e0f2f1;
+            border-left: 6px solid #26a69a;
+            padding: 1.5rem;
+            border-radius: 10px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.08);
+            color: #212121 !important;  /* Fix for dark mode */
+        }
+
+        .challenge-card {
+            background: #fffde7;
+            border-left: 6px solid #fbc02d;
+            padding: 1.5rem;
+            border-radius: 10px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.08);
+            color: #212121 !important;  /* Dark readable text */
 }
 
-            .challenge-settings {
-                background: #2e7d32;
-                color: white;
-                padding: 1.5rem;
-                border-radius: 10px;
-            }
+        .challenge-settings {
+            background: #2e7d32;
+            color: white;
+            padding: 1.5rem;
+            border-radius: 10px;
+        }
 
-            .challenge-settings * {
-                color: white !important;
-            }
+        .challenge-settings * {
+            color: white !important;
+        }
 
-            .score-excellent { color: #388e3c; font-weight: bold; }
-            .score-good { color: #fbc02d; font-weight: bold; }
-            .score-poor { color: #e53935; font-weight: bold; }
-
-            .metric-card {
-                background: #ffffff;
-                padding: 1rem;
-                border-radius: 10px;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                border-left: 5px solid #66bb6a;
-                text-align: center;
-            }
+        .score-excellent { color: #388e3c; font-weight: bold; }
+        .score-good { color: #fbc02d; font-weight: bold; }
+        .score-poor { color: #e53935; font-weight: bold; }
+
+        .metric-card {
+            background: #ffffff;
+            padding: 1rem;
+            border-radius: 10px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            border-left: 5px solid #66bb6a;
+            text-align: center;
+        }
 
-            .stButton > button {
-                background: linear-gradient(90deg, #66bb6a 0%, #43a047 100%);
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 0.5rem 1.2rem;
-                font-weight: 600;
-                box-shadow: 0 3px 8px rgba(102, 187, 106, 0.4);
-                transition: all 0.3s ease;
-            }
+        .stButton > button {
+            background: linear-gradient(90deg, #66bb6a 0%, #43a047 100%);
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 0.5rem 1.2rem;
+            font-weight: 600;
+            box-shadow: 0 3px 8px rgba(102, 187, 106, 0.4);
+            transition: all 0.3s ease;
+        }
 
-            .stButton > button:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 6px 14px rgba(67, 160, 71, 0.5);
-            }
+        .stButton > button:hover {
+            transform: translateY(-2px);
+            box-shadow: 0 6px 14px rgba(67, 160, 71, 0.5);
+        }
 
-            .stButton > button:active {
-                transform: translateY(0);
-                box-shadow: 0 2px 6px rgba(67, 160, 71, 0.3);
-            }
+        .stButton > button:active {
+            transform: translateY(0);
+            box-shadow: 0 2px 6px rgba(67, 160, 71, 0.3);
+        }
 
-            .insight-card {
-                background: #e8f5e9;
-                padding: 1.2rem;
-                border-radius: 10px;
-                border-left: 5px solid #43a047;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-                color: #212121
-            }
+        .insight-card {
+            background: #e8f5e9;
+            padding: 1.2rem;
+            border-radius: 10px;
+            border-left: 5px solid #43a047;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.08);
+            color: #212121
+        }
 
-           .evaluation-result {
-                color: #212121 !important;
-                font-weight: 500;
-            }
+       .evaluation-result {
+            color: #212121 !important;
+            font-weight: 500;
+        }
 
-            .evaluation-result * {
-                color: #212121 !important;
-                opacity: 1 !important;
-            }
+        .evaluation-result * {
+            color: #212121 !important;
+            opacity: 1 !important;
+        }
+
+        .sidebar .sidebar-content {
+            background: linear-gradient(180deg, #43cea2 0%, #185a9d 100%);
+        }
+    </style>
+    """
+
+
+@st.cache_data(show_spinner=False)
+def _build_conversation_export(document_id: str, timestamps_key: tuple,
+                               _info: Dict, _history: List[Dict]) -> bytes:
+    """Gzipped conversation export, keyed on the entry timestamps
+
+    The length alone is not a safe key: a fresh conversation on the
+    same document can reach the same length and would be served the
+    previous conversation's bytes.
+    """
+    return gzip.compress(orjson.dumps({
+        'document_info': _info,
+        'conversation_history': _history,
+        'export_timestamp': datetime.now().isoformat()
+    }, option=_EXPORT_OPTS), compresslevel=6)
+
+
+@st.cache_data(show_spinner=False)
+def _build_challenge_export(document_id: str, scores_key: tuple,
+                            question_count: int, _info: Dict,
+                            _questions: List[Dict], _scores: Dict) -> bytes:
+    """Gzipped challenge export, keyed on the actual score values
+
+    Counts alone would serve the previous challenge's results after a
+    regeneration with the same settings.
+    """
+    return gzip.compress(orjson.dumps({
+        'document_info': _info,
+        'challenge_questions': _questions,
+        'challenge_scores': _scores,
+        'export_timestamp': datetime.now().isoformat()
+    }, option=_EXPORT_OPTS), compresslevel=6)
+
+
+@st.cache_data(show_spinner=False)
+def _build_analytics_export(document_id: str, history_len: int,
+                            scores_key: tuple, _info: Dict) -> bytes:
+    """Gzipped analytics export, keyed on the score values"""
+    return gzip.compress(orjson.dumps({
+        'document_info': _info,
+        'session_stats': {
+            'questions_asked': history_len,
+            'challenges_completed': len(scores_key),
+            'average_score': sum(scores_key) / len(scores_key) if scores_key else 0,
+            'max_score': max(scores_key) if scores_key else 0,
+            'min_score': min(scores_key) if scores_key else 0
+        },
+        'export_timestamp': datetime.now().isoformat()
+    }, option=_EXPORT_OPTS), compresslevel=6)
+
+
+@st.cache_data(show_spinner=False)
+def _build_full_export(document_id: str, timestamps_key: tuple,
+                       scores_key: tuple, question_index: int,
+                       _state: Dict) -> bytes:
+    """Gzipped full-session export, keyed on the timestamps and scores"""
+    return gzip.compress(orjson.dumps(
+        dict(_state, export_timestamp=datetime.now().isoformat()),
+        option=_EXPORT_OPTS), compresslevel=6)
 
-            .sidebar .sidebar-content {
-                background: linear-gradient(180deg, #43cea2 0%, #185a9d 100%);
-            }
-        </style>
-        """, unsafe_allow_html=True)
+
+class SmartAssistantUI:
+    """Main UI class for the Smart Research Assistant"""
+
+    def __init__(self):
+        self.setup_page_config()
+        self.initialize_session_state()
+
+    def setup_page_config(self):
+        """Configure Streamlit page settings"""
+        st.set_page_config(
+            page_title="Smart Research Assistant",
+            page_icon="🧠",
+            layout="wide",
+            initial_sidebar_state="expanded"
+        )
+
+        st.markdown(_css_block(), unsafe_allow_html=True)
 
     def initialize_session_state(self):
         """Initialize Streamlit session state variables"""
@@ -170,10 +608,22 @@ class SmartAssistantUI:
             st.session_state.conversation_history = []
         if 'challenge_questions' not in st.session_state:
             st.session_state.challenge_questions = []
+        if 'challenge_rubrics' not in st.session_state:
+            st.session_state.challenge_rubrics = []
+        if 'pending_evaluations' not in st.session_state:
+            st.session_state.pending_evaluations = []
         if 'current_question_index' not in st.session_state:
             st.session_state.current_question_index = 0
         if 'challenge_scores' not in st.session_state:
-            st.session_state.challenge_scores = []
+            # Keyed by question_index for O(1) lookup and update
+            st.session_state.challenge_scores = {}
+        if 'challenge_generation' not in st.session_state:
+            # Bumped per generation request; part of the challenge cache key
+            st.session_state.challenge_generation = 0
+        if 'challenge_score_sum' not in st.session_state:
+            st.session_state.challenge_score_sum = 0.0
+        if 'challenge_score_n' not in st.session_state:
+            st.session_state.challenge_score_n = 0
         if 'user_preferences' not in st.session_state:
             st.session_state.user_preferences = {
                 'theme': 'light',
@@ -212,32 +662,7 @@ class SmartAssistantUI:
 
             # Document info in sidebar
             if st.session_state.document_info:
-                st.markdown("---")
-                st.markdown("### 📄 Current Document")
-                st.write(
-                    f"**Filename:** {st.session_state.document_info['filename']}")
-                st.write(
-                    f"**Type:** {st.session_state.document_info['file_type']}")
-                st.write(
-                    f"**Words:** {st.session_state.document_info['word_count']:,}")
-                st.write(
-                    f"**Characters:** {st.session_state.document_info['char_count']:,}")
-
-                # Progress indicators
-                st.markdown("### 📈 Progress")
-                st.write(
-                    f"Questions Asked: {len(st.session_state.conversation_history)}")
-                st.write(
-                    f"Challenges Completed: {len(st.session_state.challenge_scores)}")
-
-                if st.session_state.challenge_scores:
-                    avg_score = sum(s['score'] for s in st.session_state.challenge_scores) / len(
-                        st.session_state.challenge_scores)
-                    st.write(f"Average Score: {avg_score:.1f}%")
-
-                if st.button("🗑️ Clear Document"):
-                    self.clear_session()
-                    st.rerun()
+                self._sidebar_doc_panel()
 
             # Quick stats
             st.markdown("---")
@@ -245,9 +670,8 @@ class SmartAssistantUI:
             st.metric("Session Questions", len(
                 st.session_state.conversation_history))
             if st.session_state.challenge_scores:
-                avg_score = sum(s['score'] for s in st.session_state.challenge_scores) / \
-                    len(st.session_state.challenge_scores)
-                st.metric("Avg Challenge Score", f"{avg_score:.1f}%")
+                st.metric("Avg Challenge Score",
+                          f"{_avg_challenge_score():.1f}%")
 
         # Main content based on navigation
         if selected == "📄 Upload Document":
@@ -261,6 +685,33 @@ class SmartAssistantUI:
         elif selected == "⚙️ Settings":
             self.settings_page()
 
+    @st.fragment
+    def _sidebar_doc_panel(self):
+        """Sidebar document panel
+
+        Runs as a fragment so main-pane widget changes don't re-execute
+        it; only its own button reruns the full app.
+        """
+        st.markdown("---")
+        st.markdown("### 📄 Current Document")
+        for line in _doc_stat_lines(st.session_state.document_id,
+                                    st.session_state.document_info):
+            st.write(line)
+
+        # Progress indicators
+        st.markdown("### 📈 Progress")
+        st.write(
+            f"Questions Asked: {len(st.session_state.conversation_history)}")
+        st.write(
+            f"Challenges Completed: {len(st.session_state.challenge_scores)}")
+
+        if st.session_state.challenge_scores:
+            st.write(f"Average Score: {_avg_challenge_score():.1f}%")
+
+        if st.button("🗑️ Clear Document"):
+            self.clear_session()
+            st.rerun(scope="app")
+
     def upload_document_page(self):
         """Document upload interface"""
         st.markdown("## 📄 Upload Your Document")
@@ -271,7 +722,8 @@ class SmartAssistantUI:
                 f"✅ Document '{st.session_state.document_info['filename']}' is ready!")
 
             with st.expander("📄 Document Summary", expanded=True):
-                st.write(st.session_state.document_info['summary'])
+                st.write(_doc_summary(st.session_state.document_id,
+                                      st.session_state.document_info))
 
             # Document statistics
             col1, col2, col3, col4 = st.columns(4)
@@ -295,13 +747,12 @@ class SmartAssistantUI:
                 st.rerun()
         else:
             # Upload interface
-            st.markdown("""
-            <div class="upload-section">
-                <h3>📁 Upload your document to get started</h3>
-                <p>Supported formats: PDF, TXT, DOCX (Max 10MB)</p>
-                <p>Once uploaded, you can ask questions, take challenges, and view analytics!</p>
-            </div>
-            """, unsafe_allow_html=True)
+            with st.container(border=True):
+                st.subheader("📁 Upload your document to get started")
+                st.write("Supported formats: PDF, TXT, DOCX (Max 10MB)")
+                st.write(
+                    "Once uploaded, you can ask questions, take challenges, "
+                    "and view analytics!")
 
             uploaded_file = st.file_uploader(
                 "Choose a file",
@@ -317,8 +768,26 @@ class SmartAssistantUI:
                 if st.button("🚀 Process Document", type="primary"):
                     self.process_uploaded_file(uploaded_file)
 
+    @st.fragment
     def process_uploaded_file(self, uploaded_file):
-        """Process the uploaded file"""
+        """Process the uploaded file
+
+        Runs as a fragment so the progress-bar updates stay confined to
+        this container instead of re-executing the whole script.
+        """
+        # Reject oversized or unsupported files before spending a full
+        # upload round-trip on a guaranteed 4xx
+        if uploaded_file.size > MAX_UPLOAD_BYTES:
+            st.error(
+                f"❌ File too large ({uploaded_file.size / 1e6:.1f} MB > "
+                f"{MAX_UPLOAD_BYTES / 1e6:.0f} MB)")
+            return
+        if Path(uploaded_file.name).suffix.lower() not in SUPPORTED_FORMATS:
+            st.error(
+                f"❌ Unsupported file type. Supported formats: "
+                f"{', '.join(SUPPORTED_FORMATS)}")
+            return
+
         progress_bar = st.progress(0)
         status_text = st.empty()
 
@@ -326,36 +795,43 @@ class SmartAssistantUI:
             status_text.text("📤 Uploading document...")
             progress_bar.progress(25)
 
-            # Prepare file for upload
-            files = {"file": (uploaded_file.name,
-                              uploaded_file.getvalue(), uploaded_file.type)}
+            # Stream the file handle directly instead of materializing the
+            # whole payload with getvalue(), so large uploads never hold a
+            # second in-memory copy
+            uploaded_file.seek(0)
+            encoder = MultipartEncoder(fields={
+                "file": (uploaded_file.name, uploaded_file, uploaded_file.type)
+            })
 
             # Upload to API
-            response = requests.post(f"{API_BASE_URL}/upload", files=files)
+            response = get_http_session().post(
+                f"{API_BASE_URL}/upload",
+                data=encoder,
+                headers={"Content-Type": encoder.content_type},
+                timeout=REQUEST_TIMEOUT
+            )
             response.raise_for_status()
 
             progress_bar.progress(50)
             status_text.text("🔍 Processing document...")
 
-            result = response.json()
+            result = orjson.loads(response.content)
 
             progress_bar.progress(75)
             status_text.text("💾 Saving document info...")
 
-            # Store document info
+            # Store document info as a one-pass subset of the response
             st.session_state.document_id = result['document_id']
             st.session_state.document_info = {
-                'filename': result['filename'],
-                'file_type': result['file_type'],
-                'word_count': result['word_count'],
-                'char_count': result['char_count'],
-                'summary': result['summary']
+                key: result[key]
+                for key in ('filename', 'file_type', 'word_count',
+                            'char_count', 'summary')
             }
 
             progress_bar.progress(100)
             status_text.text("✅ Document processed successfully!")
 
-            st.success("🎉 Document uploaded and processed successfully!")
+            st.toast("✅ Document processed", icon="🎉")
 
             # Display summary
             with st.expander("📄 Document Summary", expanded=True):
@@ -374,10 +850,11 @@ class SmartAssistantUI:
             st.info(
                 "💡 Now you can ask questions about your document or try the challenge mode!")
 
-            time.sleep(2)
             progress_bar.empty()
             status_text.empty()
-            st.rerun()
+            # Full-app rerun so the sidebar document panel picks up the
+            # new document
+            st.rerun(scope="app")
 
         except requests.exceptions.RequestException as e:
             st.error(f"❌ Error uploading document: {str(e)}")
@@ -419,24 +896,14 @@ class SmartAssistantUI:
         # Question input
         st.markdown("### 🤔 What would you like to know?")
 
-        # Use quick question if selected
-        default_question = getattr(st.session_state, 'quick_question', '')
-        if default_question:
-            question = st.text_area(
-                "Enter your question:",
-                value=default_question,
-                placeholder="Ask anything about the document...",
-                height=100
-            )
-            # Clear the quick question
-            if hasattr(st.session_state, 'quick_question'):
-                delattr(st.session_state, 'quick_question')
-        else:
-            question = st.text_area(
-                "Enter your question:",
-                placeholder="Ask anything about the document...",
-                height=100
-            )
+        # Use quick question if selected, consuming it in one dict op
+        default_question = st.session_state.pop('quick_question', '')
+        question = st.text_area(
+            "Enter your question:",
+            value=default_question,
+            placeholder="Ask anything about the document...",
+            height=100
+        )
 
         col1, col2, col3 = st.columns([1, 1, 2])
         with col1:
@@ -462,41 +929,65 @@ class SmartAssistantUI:
 
             filtered_history = st.session_state.conversation_history
             if search_term:
-                filtered_history = [
-                    exchange for exchange in st.session_state.conversation_history
-                    if search_term.lower() in exchange['question'].lower() or
-                    search_term.lower() in exchange['answer'].lower()
-                ]
-
-            for i, exchange in enumerate(reversed(filtered_history)):
-                original_index = len(
-                    st.session_state.conversation_history) - len(filtered_history) + i + 1
-                with st.expander(f"Q{original_index}: {exchange['question'][:50]}...", expanded=i == 0):
-                    st.markdown(f"**❓ Question:** {exchange['question']}")
-                    st.markdown(f"**🤖 Answer:** {exchange['answer']}")
-                    st.markdown(
-                        f"**📖 Justification:** {exchange['justification']}")
+                history = st.session_state.conversation_history
+                filtered_history = _filter_history(
+                    search_term,
+                    st.session_state.document_id,
+                    len(history),
+                    history[-1].get('ts_epoch', 0) if history else 0,
+                    history)
+
+            # Only render one page of entries; a 50-question session would
+            # otherwise re-serialize hundreds of widgets per interaction
+            max_pages = max(
+                1, -(-len(filtered_history) // HISTORY_PAGE_SIZE))
+            page = 1
+            if max_pages > 1:
+                page = st.number_input(
+                    "Page", min_value=1, max_value=max_pages, value=1)
+
+            entries = list(reversed(filtered_history))
+            page_start = (page - 1) * HISTORY_PAGE_SIZE
+            page_entries = entries[page_start:page_start + HISTORY_PAGE_SIZE]
+
+            for i, exchange in enumerate(page_entries):
+                original_index = len(filtered_history) - page_start - i
+                with st.expander(f"Q{original_index}: {exchange['question'][:50]}...", expanded=page_start + i == 0):
+                    # Plain-text widgets skip the markdown parse per entry
+                    st.caption("❓ Question")
+                    st.text(exchange['question'])
+                    st.caption("🤖 Answer")
+                    st.text(exchange['answer'])
+                    st.caption("📖 Justification")
+                    st.text(exchange['justification'])
                     if exchange.get('snippet'):
-                        st.markdown(
-                            f"**📝 Relevant Text:** *{exchange['snippet']}*")
+                        st.caption("📝 Relevant Text")
+                        st.text(exchange['snippet'])
                     if st.session_state.user_preferences['show_timestamps']:
-                        st.markdown(f"**⏰ Time:** {exchange['timestamp']}")
-
-                    # Rating system
-                    col1, col2 = st.columns([1, 4])
-                    with col1:
-                        rating = st.selectbox(
-                            "Rate this answer:",
-                            options=[0, 1, 2, 3, 4, 5],
-                            format_func=lambda x: "⭐" * x if x > 0 else "Not rated",
-                            key=f"rating_{original_index}"
-                        )
-                    with col2:
-                        if st.button(f"💾 Save Answer", key=f"save_{original_index}"):
-                            st.success("Answer saved to your notes!")
-
+                        st.caption(f"⏰ {exchange['timestamp']}")
+
+                    # Rating system, gated so collapsed entries emit no
+                    # extra child widgets
+                    if st.toggle("✏️ Rate / save", key=f"open_{original_index}"):
+                        col1, col2 = st.columns([1, 4])
+                        with col1:
+                            rating = st.selectbox(
+                                "Rate this answer:",
+                                options=[0, 1, 2, 3, 4, 5],
+                                format_func=lambda x: "⭐" * x if x > 0 else "Not rated",
+                                key=f"rating_{original_index}"
+                            )
+                        with col2:
+                            if st.button(f"💾 Save Answer", key=f"save_{original_index}"):
+                                st.success("Answer saved to your notes!")
+
+    @st.fragment
     def process_question(self, question: str):
-        """Process a user question"""
+        """Process a user question
+
+        Fragment-scoped for the same reason as process_uploaded_file:
+        progress updates should not rerun the sidebar and navigation.
+        """
         with st.spinner("🤖 Analyzing question and generating answer..."):
             progress_bar = st.progress(0)
             status_text = st.empty()
@@ -505,34 +996,35 @@ class SmartAssistantUI:
                 status_text.text("🔍 Analyzing question...")
                 progress_bar.progress(25)
 
-                # Prepare request
-                request_data = {
-                    "document_id": st.session_state.document_id,
-                    "question": question,
-                    # Last 3 exchanges
-                    "conversation_history": st.session_state.conversation_history[-3:]
-                }
+                # Only the last three (question, answer) pairs matter for
+                # prompt context; a hashable tuple doubles as the cache key
+                history_key = tuple(
+                    (e["question"], e["answer"])
+                    for e in st.session_state.conversation_history[-3:]
+                )
 
                 progress_bar.progress(50)
                 status_text.text("🤖 Generating answer...")
 
-                # Send to API
-                response = requests.post(
-                    f"{API_BASE_URL}/ask", json=request_data)
-                response.raise_for_status()
+                result = _ask_api(
+                    st.session_state.document_id, question, history_key)
 
                 progress_bar.progress(75)
                 status_text.text("📝 Formatting response...")
 
-                result = response.json()
-
                 # Add to conversation history
+                now = datetime.now()
                 exchange = {
                     "question": question,
                     "answer": result['answer'],
                     "justification": result['justification'],
                     "snippet": result.get('snippet', ''),
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
+                    # Numeric twin of the display timestamp so analytics
+                    # never has to strptime it back
+                    "ts_epoch": int(now.timestamp()),
+                    # Stored at append time so analytics never re-splits
+                    "word_count": len(question.split())
                 }
 
                 st.session_state.conversation_history.append(exchange)
@@ -544,34 +1036,19 @@ class SmartAssistantUI:
                 st.markdown("---")
                 st.markdown("### 🤖 Answer")
 
-                with st.container():
-                    st.markdown(f"""
-                    <div class="answer-card">
-                        <h4>💡 Answer:</h4>
-                        <p>{result['answer']}</p>
-                        
-                        <h4>📖 Justification:</h4>
-                        <p>{result['justification']}</p>
-                        
-                        {f"<h4>📝 Relevant Text:</h4><p><em>{result.get('snippet', '')}</em></p>" if result.get('snippet') else ""}
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                # Auto-scroll to answer if enabled
-                if st.session_state.user_preferences['auto_scroll']:
-                    st.markdown(
-                        """
-                        <script>
-                            window.scrollTo(0, document.body.scrollHeight);
-                        </script>
-                        """,
-                        unsafe_allow_html=True
-                    )
-
-                time.sleep(1)
+                with st.container(border=True):
+                    st.subheader("💡 Answer")
+                    st.write(result['answer'])
+                    st.subheader("📖 Justification")
+                    st.write(result['justification'])
+                    if result.get('snippet'):
+                        st.subheader("📝 Relevant Text")
+                        st.text(result.get('snippet', ''))
+
                 progress_bar.empty()
                 status_text.empty()
-                st.rerun()
+                # Full-app rerun so the history list picks up the exchange
+                st.rerun(scope="app")
 
             except requests.exceptions.RequestException as e:
                 st.error(f"❌ Error processing question: {str(e)}")
@@ -596,18 +1073,15 @@ class SmartAssistantUI:
 
         # Challenge mode introduction
         if not st.session_state.challenge_questions:
-            st.markdown("""
-            <div class="challenge-card">
-                <h3>🎯 Welcome to Challenge Mode!</h3>
-                <p>Test your understanding of the document with AI-generated questions.</p>
-                <ul>
-                    <li>📚 Questions are generated based on your document content</li>
-                    <li>🎚️ Multiple difficulty levels available</li>
-                    <li>📊 Get detailed feedback on your answers</li>
-                    <li>🏆 Track your progress and improvement</li>
-                </ul>
-            </div>
-            """, unsafe_allow_html=True)
+            with st.container(border=True):
+                st.subheader("🎯 Welcome to Challenge Mode!")
+                st.write(
+                    "Test your understanding of the document with "
+                    "AI-generated questions.")
+                st.write("📚 Questions are generated based on your document content")
+                st.write("🎚️ Multiple difficulty levels available")
+                st.write("📊 Get detailed feedback on your answers")
+                st.write("🏆 Track your progress and improvement")
 
             # Challenge options
             st.markdown("### ⚙️ Challenge Settings")
@@ -635,14 +1109,16 @@ class SmartAssistantUI:
             if st.session_state.challenge_scores:
                 st.markdown("---")
                 st.markdown("### 📊 Previous Challenges")
-                avg_score = sum(s['score'] for s in st.session_state.challenge_scores) / \
-                    len(st.session_state.challenge_scores)
-                st.metric("Average Score", f"{avg_score:.1f}%")
+                st.metric("Average Score", f"{_avg_challenge_score():.1f}%")
 
                 if st.button("🎲 Start New Challenge"):
                     st.session_state.challenge_questions = []
+                    st.session_state.challenge_rubrics = []
+                    st.session_state.pending_evaluations = []
                     st.session_state.current_question_index = 0
-                    st.session_state.challenge_scores = []
+                    st.session_state.challenge_scores = {}
+                    st.session_state.challenge_score_sum = 0.0
+                    st.session_state.challenge_score_n = 0
                     st.rerun()
 
             return
@@ -673,24 +1149,16 @@ class SmartAssistantUI:
         # Current question
         current_q = st.session_state.challenge_questions[st.session_state.current_question_index]
 
-        # Difficulty indicator
-        difficulty_colors = {
-            'easy': '#28a745',
-            'medium': '#ffc107',
-            'hard': '#dc3545'
-        }
-
-        st.markdown(f"""
-        <div class="challenge-card">
-            <h4>🎯 Question {st.session_state.current_question_index + 1}:</h4>
-            <p>{current_q['question']}</p>
-            <p><strong>Difficulty:</strong> 
-                <span style="color: {difficulty_colors.get(current_q['difficulty'], '#000')}">
-                    {current_q['difficulty'].title()}
-                </span>
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+        # Native widgets instead of a raw HTML card; the colored-text
+        # markdown rule is far cheaper than a full HTML parse
+        with st.container(border=True):
+            st.subheader(
+                f"🎯 Question {st.session_state.current_question_index + 1}:")
+            st.write(current_q['question'])
+            difficulty = current_q['difficulty']
+            color = DIFFICULTY_TEXT_COLORS.get(difficulty, 'gray')
+            st.markdown(
+                f":{color}[**Difficulty:** {difficulty.title()}]")
 
         # Answer input
         user_answer = st.text_area(
@@ -700,14 +1168,26 @@ class SmartAssistantUI:
             key=f"answer_{st.session_state.current_question_index}"
         )
 
+        # Deferred mode queues answers and evaluates them in one batch
+        # round-trip instead of one POST per question
+        defer = st.toggle("📦 Defer evaluation (submit all at once)",
+                          key="defer_evaluations")
+
         # Answer actions
         col1, col2, col3 = st.columns([1, 1, 2])
         with col1:
             if st.button("✅ Submit Answer", type="primary"):
-                if user_answer.strip():
-                    self.evaluate_answer(current_q, user_answer)
-                else:
+                if not user_answer.strip():
                     st.warning("⚠️ Please enter an answer!")
+                elif defer:
+                    st.session_state.pending_evaluations.append({
+                        "question_index": st.session_state.current_question_index,
+                        "question_data": current_q,
+                        "user_answer": user_answer
+                    })
+                    st.toast("📨 Answer queued for batch evaluation")
+                else:
+                    self.evaluate_answer(current_q, user_answer)
 
         with col2:
             if st.button("💡 Hint"):
@@ -722,24 +1202,25 @@ class SmartAssistantUI:
                 else:
                     st.info("This is the last question!")
 
+        pending = st.session_state.pending_evaluations
+        if pending:
+            if st.button(f"📤 Evaluate {len(pending)} queued answers"):
+                self.evaluate_answers_batch(pending)
+
         # Show previous scores for this question
-        existing_score = None
-        for score in st.session_state.challenge_scores:
-            if score['question_index'] == st.session_state.current_question_index:
-                existing_score = score
-                break
+        existing_score = st.session_state.challenge_scores.get(
+            st.session_state.current_question_index)
 
         if existing_score:
             st.markdown("---")
             st.markdown("### 📊 Previous Attempt")
             self.display_evaluation(existing_score)
 
-        # Challenge completion check
+        # Challenge completion check (unique answered questions)
         if len(st.session_state.challenge_scores) == len(st.session_state.challenge_questions):
             st.markdown("---")
             st.markdown("### 🏆 Challenge Complete!")
-            avg_score = sum(s['score'] for s in st.session_state.challenge_scores) / \
-                len(st.session_state.challenge_scores)
+            avg_score = _avg_challenge_score()
 
             if avg_score >= 80:
                 st.balloons()
@@ -752,28 +1233,31 @@ class SmartAssistantUI:
 
             if st.button("🎲 Start New Challenge"):
                 st.session_state.challenge_questions = []
+                st.session_state.challenge_rubrics = []
+                st.session_state.pending_evaluations = []
                 st.session_state.current_question_index = 0
-                st.session_state.challenge_scores = []
+                st.session_state.challenge_scores = {}
+                st.session_state.challenge_score_sum = 0.0
+                st.session_state.challenge_score_n = 0
                 st.rerun()
 
     def generate_challenge_questions(self, count: int = 5, difficulty: str = 'mixed'):
         """Generate challenge questions"""
         with st.spinner("🎲 Generating challenge questions..."):
             try:
-                request_data = {
-                    "document_id": st.session_state.document_id,
-                    "count": count,
-                    "difficulty": difficulty
-                }
-
-                response = requests.post(
-                    f"{API_BASE_URL}/challenge", json=request_data)
-                response.raise_for_status()
-
-                result = response.json()
+                st.session_state.challenge_generation += 1
+                result = _challenge_api(
+                    st.session_state.document_id, count, difficulty,
+                    st.session_state.challenge_generation)
                 st.session_state.challenge_questions = result['questions']
+                # Rubric keyword sets let evaluate_answer score clear-cut
+                # answers locally without a round-trip
+                st.session_state.challenge_rubrics = [
+                    _build_rubric(q) for q in result['questions']]
                 st.session_state.current_question_index = 0
-                st.session_state.challenge_scores = []
+                st.session_state.challenge_scores = {}
+                st.session_state.challenge_score_sum = 0.0
+                st.session_state.challenge_score_n = 0
 
                 st.success(f"✅ {count} challenge questions generated!")
                 st.rerun()
@@ -789,75 +1273,130 @@ class SmartAssistantUI:
         """Evaluate user's answer"""
         with st.spinner("📊 Evaluating your answer..."):
             try:
-                request_data = {
-                    "document_id": st.session_state.document_id,
-                    "question": question_data['question'],
-                    "user_answer": user_answer,
-                    "correct_answer": question_data['correct_answer']
-                }
+                state = st.session_state
+
+                # Clear-cut answers are scored locally against the rubric;
+                # only ambiguous ones pay the backend round-trip
+                result = None
+                rubrics = state.challenge_rubrics
+                question_index = state.current_question_index
+                if question_index < len(rubrics):
+                    result = _score_locally(
+                        question_data, rubrics[question_index], user_answer)
+
+                if result is None:
+                    result = _post_evaluate(
+                        state.document_id,
+                        question_data['question'],
+                        user_answer,
+                        question_data['correct_answer'])
+
+                self._store_score(question_index, result)
 
-                response = requests.post(
-                    f"{API_BASE_URL}/evaluate", json=request_data)
-                response.raise_for_status()
+                # Display evaluation
+                self.display_evaluation(result)
 
-                result = response.json()
+            except requests.exceptions.RequestException as e:
+                st.error(f"❌ Error evaluating answer: {str(e)}")
+                logger.error(f"Answer evaluation error: {str(e)}")
+            except Exception as e:
+                st.error(f"❌ Unexpected error: {str(e)}")
+                logger.error(f"Unexpected error: {str(e)}")
 
-                # Store score
-                score_data = {
-                    "question_index": st.session_state.current_question_index,
-                    "score": result['score'],
-                    "feedback": result['feedback'],
-                    "reference": result['reference']
+    def evaluate_answers_batch(self, pending: List[Dict]):
+        """Evaluate all queued answers in a single backend round-trip"""
+        with st.spinner(f"📊 Evaluating {len(pending)} answers..."):
+            try:
+                payload = {
+                    "document_id": st.session_state.document_id,
+                    "items": [
+                        {
+                            "question": p['question_data']['question'],
+                            "user_answer": p['user_answer'],
+                            "correct_answer": p['question_data']['correct_answer']
+                        }
+                        for p in pending
+                    ]
                 }
 
-                # Update or add score
-                existing_score = None
-                for i, score in enumerate(st.session_state.challenge_scores):
-                    if score['question_index'] == st.session_state.current_question_index:
-                        existing_score = i
-                        break
-
-                if existing_score is not None:
-                    st.session_state.challenge_scores[existing_score] = score_data
+                response = get_http_session().post(
+                    f"{API_BASE_URL}/evaluate_batch", json=payload,
+                    timeout=REQUEST_TIMEOUT)
+                if response.status_code == 404:
+                    # A missing route 404s with detail "Not Found";
+                    # anything else (e.g. "Document not found") is the
+                    # endpoint rejecting the request itself, and
+                    # replaying it per item would just 404 N more times
+                    try:
+                        detail = orjson.loads(response.content).get('detail')
+                    except orjson.JSONDecodeError:
+                        detail = None
+                    if detail != "Not Found":
+                        response.raise_for_status()
+                    # Older backend without /evaluate_batch: fan the items
+                    # out over the worker pool instead of serial POSTs
+                    results = list(get_executor().map(
+                        _evaluate_one,
+                        [dict(item, document_id=payload['document_id'])
+                         for item in payload['items']]))
                 else:
-                    st.session_state.challenge_scores.append(score_data)
-
-                # Display evaluation
-                self.display_evaluation(result)
+                    response.raise_for_status()
+                    # Results come back in request order
+                    results = orjson.loads(response.content)['results']
+                for item, result in zip(pending, results):
+                    self._store_score(item['question_index'], result)
+
+                st.session_state.pending_evaluations = []
+                st.toast(f"✅ {len(results)} answers evaluated")
+                st.rerun()
 
             except requests.exceptions.RequestException as e:
-                st.error(f"❌ Error evaluating answer: {str(e)}")
-                logger.error(f"Answer evaluation error: {str(e)}")
+                st.error(f"❌ Error evaluating answers: {str(e)}")
+                logger.error(f"Batch evaluation error: {str(e)}")
             except Exception as e:
                 st.error(f"❌ Unexpected error: {str(e)}")
                 logger.error(f"Unexpected error: {str(e)}")
 
+    def _store_score(self, question_index: int, result: Dict):
+        """Record an evaluation result, keeping the running mean in sync"""
+        state = st.session_state
+        score_data = {
+            "question_index": question_index,
+            "score": result['score'],
+            "feedback": result['feedback'],
+            "reference": result['reference']
+        }
+
+        existing = state.challenge_scores.get(question_index)
+        if existing is not None:
+            state.challenge_score_sum += result['score'] - existing['score']
+        else:
+            state.challenge_score_sum += result['score']
+            state.challenge_score_n += 1
+
+        state.challenge_scores[question_index] = score_data
+
     def display_evaluation(self, result: Dict):
         """Display answer evaluation"""
         score = result['score']
 
-        # Determine score color and emoji
+        # Native banner + metric send small websocket deltas instead of
+        # a re-sanitized HTML card
         if score >= 80:
-            score_class = "score-excellent"
-            emoji = "🎉"
-            message = "Excellent work!"
+            banner, emoji, message = st.success, "🎉", "Excellent work!"
         elif score >= 60:
-            score_class = "score-good"
-            emoji = "👍"
-            message = "Good job!"
+            banner, emoji, message = st.warning, "👍", "Good job!"
         else:
-            score_class = "score-poor"
-            emoji = "📚"
-            message = "Keep practicing!"
-
-        st.markdown(f"""
-        <div class="answer-card">
-            <h4>{emoji} Evaluation Result - {message}</h4>
-            <p><strong>Score:</strong> <span class="{score_class}">{score}/100</span></p>
-            <p><strong>Feedback:</strong> {result['feedback']}</p>
-            <p><strong>Reference:</strong> {result['reference']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+            banner, emoji, message = st.error, "📚", "Keep practicing!"
+
+        banner(f"{emoji} Evaluation Result - {message}")
+        col1, col2 = st.columns([1, 3])
+        col1.metric("Score", f"{score}/100")
+        with col2:
+            st.caption("Feedback")
+            st.write(result['feedback'])
+            st.caption("Reference")
+            st.write(result['reference'])
 
     def analytics_page(self):
         """Analytics and progress tracking"""
@@ -869,97 +1408,93 @@ class SmartAssistantUI:
                 st.switch_page("📄 Upload Document")
             return
 
+        self._render_analytics_body(
+            st.session_state.conversation_history,
+            st.session_state.challenge_scores,
+            st.session_state.document_info)
+
+    @st.fragment
+    def _render_analytics_body(self, history: List[Dict],
+                               challenge_scores: Dict, doc_info: Dict):
+        """Stats and charts for the analytics page
+
+        Runs as a fragment so interactions with widgets elsewhere in the
+        app rerun only their own scope instead of re-executing this
+        dense body; the state reads double as local aliases.
+        """
+        # One cached, vectorized pass over the session data; the tuples
+        # double as cache keys for the figure builders below
+        score_indices = tuple(sorted(challenge_scores))
+        scores_key = tuple(challenge_scores[k]['score']
+                           for k in score_indices)
+        # Old history entries predate the stored word_count; split once
+        # here as a fallback
+        lengths_key = tuple(
+            q.get('word_count') or len(q['question'].split())
+            for q in history)
+        # Old entries predate ts_epoch; parse their display string once
+        # here as a fallback
+        timestamps_key = tuple(
+            q.get('ts_epoch') or int(datetime.strptime(
+                q['timestamp'], "%Y-%m-%d %H:%M:%S").timestamp())
+            for q in history)
+        stats = compute_analytics(scores_key, lengths_key, timestamps_key)
+
         # Document statistics
-        if st.session_state.document_info:
+        if doc_info:
             st.markdown("### 📄 Document Statistics")
 
             col1, col2, col3, col4 = st.columns(4)
             with col1:
                 st.metric(
-                    "📊 Words", f"{st.session_state.document_info['word_count']:,}")
+                    "📊 Words", f"{doc_info['word_count']:,}")
             with col2:
                 st.metric("🔤 Characters",
-                          f"{st.session_state.document_info['char_count']:,}")
+                          f"{doc_info['char_count']:,}")
             with col3:
                 st.metric("💬 Questions Asked", len(
-                    st.session_state.conversation_history))
+                    history))
             with col4:
                 st.metric("🎯 Challenges Completed", len(
-                    st.session_state.challenge_scores))
+                    challenge_scores))
 
         # Challenge performance
-        if st.session_state.challenge_scores:
+        if challenge_scores:
             st.markdown("### 🎯 Challenge Performance")
 
-            scores = [s['score'] for s in st.session_state.challenge_scores]
-            avg_score = sum(scores) / len(scores)
+            scores = stats['scores']
+            avg_score = stats['avg_score']
 
             col1, col2 = st.columns(2)
 
             with col1:
                 # Score distribution
-                fig = go.Figure(data=[go.Bar(
-                    x=[f"Q{s['question_index']+1}" for s in st.session_state.challenge_scores],
-                    y=scores,
-                    marker_color=[
-                        '#28a745' if s >= 80 else '#ffc107' if s >= 60 else '#dc3545' for s in scores],
-                    text=scores,
-                    textposition='auto'
-                )])
-                fig.update_layout(
-                    title="Challenge Question Scores",
-                    xaxis_title="Question",
-                    yaxis_title="Score",
-                    showlegend=False,
-                    height=400
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(_build_score_bar(score_indices, scores_key),
+                                use_container_width=True)
 
             with col2:
                 # Average score gauge
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=avg_score,
-                    domain={'x': [0, 1], 'y': [0, 1]},
-                    title={'text': "Average Score"},
-                    gauge={
-                        'axis': {'range': [None, 100]},
-                        'bar': {'color': "darkblue"},
-                        'steps': [
-                            {'range': [0, 60], 'color': "lightgray"},
-                            {'range': [60, 80], 'color': "yellow"},
-                            {'range': [80, 100], 'color': "green"}
-                        ],
-                        'threshold': {
-                            'line': {'color': "red", 'width': 4},
-                            'thickness': 0.75,
-                            'value': 90
-                        }
-                    }
-                ))
-                fig.update_layout(height=400)
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(_build_gauge(avg_score),
+                                use_container_width=True)
 
             # Performance insights
             st.markdown("### 💡 Performance Insights")
 
-            # Calculate insights
-            max_score = max(scores)
-            min_score = min(scores)
-            score_range = max_score - min_score
+            max_score = stats['max_score']
+            min_score = stats['min_score']
+            score_range = stats['score_range']
 
             col1, col2 = st.columns(2)
 
             with col1:
-                st.markdown(f"""
-                <div class="insight-card">
-                    <h4>📈 Score Analysis</h4>
-                    <p><strong>Highest Score:</strong> {max_score}%</p>
-                    <p><strong>Lowest Score:</strong> {min_score}%</p>
-                    <p><strong>Score Range:</strong> {score_range}%</p>
-                    <p><strong>Consistency:</strong> {'High' if score_range < 20 else 'Medium' if score_range < 40 else 'Low'}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown("#### 📈 Score Analysis")
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Highest", f"{max_score}%")
+                m2.metric("Lowest", f"{min_score}%")
+                m3.metric("Range", f"{score_range}%")
+                consistency = ('High' if score_range < 20
+                               else 'Medium' if score_range < 40 else 'Low')
+                st.caption(f"Consistency: {consistency}")
 
             with col2:
                 # Performance trend
@@ -967,63 +1502,32 @@ class SmartAssistantUI:
                     trend = "improving" if scores[-1] > scores[0] else "declining" if scores[-1] < scores[0] else "stable"
                     trend_emoji = "📈" if trend == "improving" else "📉" if trend == "declining" else "➡️"
 
-                    st.markdown(f"""
-                    <div class="insight-card">
-                        <h4>{trend_emoji} Performance Trend</h4>
-                        <p><strong>Overall Trend:</strong> {trend.title()}</p>
-                        <p><strong>First Score:</strong> {scores[0]}%</p>
-                        <p><strong>Latest Score:</strong> {scores[-1]}%</p>
-                        <p><strong>Improvement:</strong> {scores[-1] - scores[0]:+.1f}%</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(f"#### {trend_emoji} Performance Trend")
+                    m1, m2 = st.columns(2)
+                    m1.metric("First Score", f"{scores[0]}%")
+                    m2.metric("Latest Score", f"{scores[-1]}%",
+                              delta=f"{scores[-1] - scores[0]:+.1f}%")
+                    st.caption(f"Overall trend: {trend.title()}")
 
         # Question asking patterns
-        if st.session_state.conversation_history:
+        if history:
             st.markdown("### 💬 Question Asking Patterns")
 
-            # Questions over time
-            question_times = [datetime.strptime(
-                q['timestamp'], "%Y-%m-%d %H:%M:%S") for q in st.session_state.conversation_history]
-            question_hours = [t.hour for t in question_times]
-
             col1, col2 = st.columns(2)
 
             with col1:
                 # Questions by hour
-                hour_counts = {}
-                for hour in question_hours:
-                    hour_counts[hour] = hour_counts.get(hour, 0) + 1
-
-                fig = go.Figure(data=[go.Bar(
-                    x=list(hour_counts.keys()),
-                    y=list(hour_counts.values()),
-                    marker_color='#667eea'
-                )])
-                fig.update_layout(
-                    title="Questions Asked by Hour",
-                    xaxis_title="Hour of Day",
-                    yaxis_title="Number of Questions",
-                    height=300
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(
+                    _build_hour_bar(tuple(stats['hours'].tolist()),
+                                    tuple(stats['hour_counts'].tolist())),
+                    use_container_width=True)
 
             with col2:
                 # Question length distribution
-                question_lengths = [len(q['question'].split())
-                                    for q in st.session_state.conversation_history]
-
-                fig = go.Figure(data=[go.Histogram(
-                    x=question_lengths,
-                    nbinsx=10,
-                    marker_color='#764ba2'
-                )])
-                fig.update_layout(
-                    title="Question Length Distribution",
-                    xaxis_title="Words in Question",
-                    yaxis_title="Frequency",
-                    height=300
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(
+                    _build_length_hist(
+                        tuple(stats['question_lengths'].tolist())),
+                    use_container_width=True)
 
         # Summary statistics
         st.markdown("### 📊 Session Summary")
@@ -1032,41 +1536,30 @@ class SmartAssistantUI:
 
         with col1:
             session_duration = "N/A"
-            if st.session_state.conversation_history:
-                first_question = datetime.strptime(
-                    st.session_state.conversation_history[0]['timestamp'], "%Y-%m-%d %H:%M:%S")
-                last_question = datetime.strptime(
-                    st.session_state.conversation_history[-1]['timestamp'], "%Y-%m-%d %H:%M:%S")
-                duration = last_question - first_question
-                session_duration = f"{duration.seconds // 60} min"
+            if history:
+                session_duration = f"{stats['duration_min']} min"
 
             st.metric("⏱️ Session Duration", session_duration)
 
         with col2:
-            avg_question_length = 0
-            if st.session_state.conversation_history:
-                total_words = sum(len(q['question'].split())
-                                  for q in st.session_state.conversation_history)
-                avg_question_length = total_words / \
-                    len(st.session_state.conversation_history)
+            avg_question_length = stats.get('avg_question_length', 0)
 
             st.metric("📝 Avg Question Length",
                       f"{avg_question_length:.1f} words")
 
         with col3:
             engagement_score = 0
-            if st.session_state.document_info:
+            if doc_info:
                 questions_per_1000_words = (len(
-                    st.session_state.conversation_history) / st.session_state.document_info['word_count']) * 1000
+                    history) / doc_info['word_count']) * 1000
                 engagement_score = min(questions_per_1000_words * 10, 100)
 
             st.metric("📈 Engagement Score", f"{engagement_score:.1f}%")
 
         with col4:
             learning_progress = 0
-            if st.session_state.challenge_scores:
-                learning_progress = sum(
-                    s['score'] for s in st.session_state.challenge_scores) / len(st.session_state.challenge_scores)
+            if challenge_scores:
+                learning_progress = _avg_challenge_score()
 
             st.metric("🎓 Learning Progress", f"{learning_progress:.1f}%")
 
@@ -1158,7 +1651,7 @@ class SmartAssistantUI:
         with col3:
             uploaded_data = st.file_uploader(
                 "Import Session Data",
-                type=['json'],
+                type=['json', 'gz'],
                 help="Upload previously exported session data"
             )
 
@@ -1206,7 +1699,7 @@ class SmartAssistantUI:
     def test_api_connection(self):
         """Test API connection"""
         try:
-            response = requests.get(f"{API_BASE_URL}/health", timeout=5)
+            response = get_http_session().get(f"{API_BASE_URL}/health", timeout=5)
             response.raise_for_status()
             st.success("✅ API connection successful!")
         except requests.exceptions.RequestException as e:
@@ -1220,8 +1713,12 @@ class SmartAssistantUI:
         st.session_state.document_info = None
         st.session_state.conversation_history = []
         st.session_state.challenge_questions = []
+        st.session_state.challenge_rubrics = []
+        st.session_state.pending_evaluations = []
         st.session_state.current_question_index = 0
-        st.session_state.challenge_scores = []
+        st.session_state.challenge_scores = {}
+        st.session_state.challenge_score_sum = 0.0
+        st.session_state.challenge_score_n = 0
 
     def clear_all_data(self):
         """Clear all session data"""
@@ -1236,17 +1733,18 @@ class SmartAssistantUI:
             st.warning("No conversation history to export!")
             return
 
-        export_data = {
-            'document_info': st.session_state.document_info,
-            'conversation_history': st.session_state.conversation_history,
-            'export_timestamp': datetime.now().isoformat()
-        }
+        history = st.session_state.conversation_history
+        payload = _build_conversation_export(
+            st.session_state.document_id,
+            tuple(e.get('ts_epoch', 0) for e in history),
+            st.session_state.document_info,
+            history)
 
         st.download_button(
             label="📥 Download Conversation History",
-            data=json.dumps(export_data, indent=2),
-            file_name=f"conversation_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
+            data=payload,
+            file_name=f"conversation_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz",
+            mime="application/gzip"
         )
 
     def export_challenge_results(self):
@@ -1255,18 +1753,20 @@ class SmartAssistantUI:
             st.warning("No challenge results to export!")
             return
 
-        export_data = {
-            'document_info': st.session_state.document_info,
-            'challenge_questions': st.session_state.challenge_questions,
-            'challenge_scores': st.session_state.challenge_scores,
-            'export_timestamp': datetime.now().isoformat()
-        }
+        scores = st.session_state.challenge_scores
+        payload = _build_challenge_export(
+            st.session_state.document_id,
+            tuple(sorted((i, s['score']) for i, s in scores.items())),
+            len(st.session_state.challenge_questions),
+            st.session_state.document_info,
+            st.session_state.challenge_questions,
+            scores)
 
         st.download_button(
             label="📥 Download Challenge Results",
-            data=json.dumps(export_data, indent=2),
-            file_name=f"challenge_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
+            data=payload,
+            file_name=f"challenge_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz",
+            mime="application/gzip"
         )
 
     def export_analytics(self):
@@ -1275,53 +1775,54 @@ class SmartAssistantUI:
             st.warning("No analytics data to export!")
             return
 
-        # Calculate analytics
-        scores = [s['score']
-                  for s in st.session_state.challenge_scores] if st.session_state.challenge_scores else []
-
-        analytics_data = {
-            'document_info': st.session_state.document_info,
-            'session_stats': {
-                'questions_asked': len(st.session_state.conversation_history),
-                'challenges_completed': len(st.session_state.challenge_scores),
-                'average_score': sum(scores) / len(scores) if scores else 0,
-                'max_score': max(scores) if scores else 0,
-                'min_score': min(scores) if scores else 0
-            },
-            'export_timestamp': datetime.now().isoformat()
-        }
+        payload = _build_analytics_export(
+            st.session_state.document_id,
+            len(st.session_state.conversation_history),
+            tuple(s['score']
+                  for s in st.session_state.challenge_scores.values()),
+            st.session_state.document_info)
 
         st.download_button(
             label="📥 Download Analytics",
-            data=json.dumps(analytics_data, indent=2),
-            file_name=f"analytics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
+            data=payload,
+            file_name=f"analytics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz",
+            mime="application/gzip"
         )
 
     def export_all_data(self):
         """Export all session data"""
-        export_data = {
-            'document_id': st.session_state.document_id,
-            'document_info': st.session_state.document_info,
-            'conversation_history': st.session_state.conversation_history,
-            'challenge_questions': st.session_state.challenge_questions,
-            'challenge_scores': st.session_state.challenge_scores,
-            'current_question_index': st.session_state.current_question_index,
-            'user_preferences': st.session_state.user_preferences,
-            'export_timestamp': datetime.now().isoformat()
-        }
+        payload = _build_full_export(
+            st.session_state.document_id,
+            tuple(e.get('ts_epoch', 0)
+                  for e in st.session_state.conversation_history),
+            tuple(sorted((i, s['score']) for i, s
+                         in st.session_state.challenge_scores.items())),
+            st.session_state.current_question_index,
+            {
+                'document_id': st.session_state.document_id,
+                'document_info': st.session_state.document_info,
+                'conversation_history': st.session_state.conversation_history,
+                'challenge_questions': st.session_state.challenge_questions,
+                'challenge_scores': st.session_state.challenge_scores,
+                'current_question_index': st.session_state.current_question_index,
+                'user_preferences': st.session_state.user_preferences,
+            })
 
         st.download_button(
             label="📥 Download All Session Data",
-            data=json.dumps(export_data, indent=2),
-            file_name=f"session_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
+            data=payload,
+            file_name=f"session_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz",
+            mime="application/gzip"
         )
 
     def import_session_data(self, uploaded_file):
         """Import session data from file"""
         try:
-            data = json.loads(uploaded_file.read().decode('utf-8'))
+            raw = uploaded_file.read()
+            # Exports are gzipped; plain JSON from older exports still works
+            if raw[:2] == b'\x1f\x8b':
+                raw = gzip.decompress(raw)
+            data = orjson.loads(raw)
 
             # Validate data structure
             required_keys = ['document_info', 'conversation_history',
@@ -1341,10 +1842,23 @@ class SmartAssistantUI:
             if 'current_question_index' in data:
                 st.session_state.current_question_index = data['current_question_index']
 
+            # Normalize imported scores to the dict shape (older exports
+            # used a list; JSON stringifies dict keys) and rebuild the
+            # running mean
+            scores = st.session_state.challenge_scores
+            if isinstance(scores, list):
+                scores = {s['question_index']: s for s in scores}
+            else:
+                scores = {int(k): v for k, v in scores.items()}
+            st.session_state.challenge_scores = scores
+            st.session_state.challenge_score_sum = float(
+                sum(s['score'] for s in scores.values()))
+            st.session_state.challenge_score_n = len(scores)
+
             st.success("✅ Session data imported successfully!")
             st.rerun()
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             st.error("❌ Invalid JSON file!")
         except Exception as e:
             st.error(f"❌ Error importing data: {str(e)}")